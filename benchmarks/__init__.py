@@ -0,0 +1 @@
+# offline stand-in for stats.nba.com and page latency benchmarks
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import replay
+from benchmarks.fixtures import GAME_IDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# page, script and query parameters of every benchmarked view, a None script is the offline dataset build
+SCENARIOS = {
+    "home": ("Main.py", {}),
+    "boxscore": ("Main.py", {"page": GAME_IDS[0]}),
+    "league_leaders": ("pages/League_Leaders.py", {}),
+    "guess_the_player": ("pages/Guess_the_Player.py", {}),
+    "ingest": (None, {}),
+}
+# seasons the ingest scenario builds, the replay server answers every season with the same fixture
+INGEST_SEASONS = 3
+
+
+# build the dataset from the replay server: a cold build with no checkpoints, then warm ones that only refetch
+# the live season, so the ingest path is checked against responses in the real format
+def run_ingest(name, warm_runs):
+    from helpers.cache import cache_stats
+    from helpers.ingest import SEASONS, build_dataset
+
+    seasons = SEASONS[-INGEST_SEASONS:]
+    errors = []
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "combined_nba_stats.csv")
+        for _ in range(1 + warm_runs):
+            start = time.perf_counter()
+            try:
+                data = build_dataset(seasons, output=output, log=lambda line: None)
+                if len(data) == 0:
+                    errors.append("the dataset is empty")
+            except Exception as error:
+                errors.append(f"{type(error).__name__}: {error}")
+            timings.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "scenario": name, "cold_ms": timings[0] * 1000, "warm_ms": [t * 1000 for t in timings[1:]], "errors": errors,
+        "cache": cache_stats()["budget"],
+    }))
+
+
+# render one page in this process with streamlit's AppTest: a cold run with empty caches, then warm reruns
+# prints the timings as one json line, it's started in a fresh process for every page so "cold" really is cold
+def run_scenario(name, warm_runs):
+    from streamlit.testing.v1 import AppTest
+    from helpers.cache import cache_stats
+
+    script, query_params = SCENARIOS[name]
+    if script is None:
+        run_ingest(name, warm_runs)
+        return
+    app = AppTest.from_file(os.path.join(ROOT, script), default_timeout=300)
+    for key, value in query_params.items():
+        app.query_params[key] = value
+
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    errors = [str(exception.value) for exception in app.exception]
+
+    warm = []
+    for _ in range(warm_runs):
+        start = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - start)
+        errors += [str(exception.value) for exception in app.exception]
+
+    print(json.dumps({
+        "scenario": name, "cold_ms": cold * 1000, "warm_ms": [t * 1000 for t in warm], "errors": errors,
+        # what the memory level of the caches holds once the page is warm
+        "cache": cache_stats()["budget"],
+    }))
+
+
+# run every scenario against a local replay server, each in its own process with its own empty disk cache
+def run_all(scenarios, warm_runs, latency):
+    server = replay.start(latency=latency)
+    results = []
+    for name in scenarios:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = dict(os.environ, NBA_STATS_BASE_URL=server.base_url, NBA_APP_CACHE_DIR=cache_dir)
+            before = sum(server.requests.values())
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench", "--worker", name, "--warm-runs", str(warm_runs)],
+                cwd=ROOT, env=env, capture_output=True, text=True,
+            )
+            lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+            if output.returncode != 0 or not lines:
+                raise RuntimeError(f"{name} failed:\n{output.stderr}")
+            result = json.loads(lines[-1])
+            result["upstream_requests"] = sum(server.requests.values()) - before
+            results.append(result)
+    server.shutdown()
+    return results
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else float("nan")
+
+
+def print_table(results):
+    print(f"{'scenario':<20}{'cold ms':>10}{'warm ms':>10}{'upstream':>10}{'cache KB':>10}  errors")
+    for result in results:
+        print(f"{result['scenario']:<20}{result['cold_ms']:>10.1f}{median(result['warm_ms']):>10.1f}"
+              f"{result['upstream_requests']:>10}{result['cache']['bytes'] / 1024:>10.1f}  {len(result['errors'])}")
+
+
+# compare with an earlier --output file, anything slower than the tolerance counts as a regression
+def regressions(results, baseline, tolerance):
+    previous = {result["scenario"]: result for result in baseline}
+    found = []
+    for result in results:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        for label, new_ms, old_ms in [
+            ("cold", result["cold_ms"], old["cold_ms"]),
+            ("warm", median(result["warm_ms"]), median(old["warm_ms"])),
+        ]:
+            if new_ms > old_ms * (1 + tolerance):
+                found.append(f"{result['scenario']} {label}: {old_ms:.1f} ms -> {new_ms:.1f} ms")
+    return found
+
+
+# python -m benchmarks.bench [--latency 0.3] [--output results.json] [--baseline results.json]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold and warm render times of every page against the replay server.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--warm-runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the replay server waits before answering")
+    parser.add_argument("--output", help="save the results as json")
+    parser.add_argument("--baseline", help="earlier results to compare with, exits with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--worker", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_scenario(args.worker, args.warm_runs)
+        return
+
+    results = run_all(args.scenarios, args.warm_runs, args.latency)
+    print_table(results)
+    # a page or the ingest failing against the replay server is a broken check, not just a slow one
+    failed = [f"{result['scenario']}: {error}" for result in results for error in result["errors"]]
+    for line in failed:
+        print(f"ERROR {line}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import random
+
+# where the responses the replay server serves live
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# the game ids and player ids the fixtures cover
+GAME_IDS = ["0022400101", "0022400102", "0022400103", "0022400104"]
+# a preseason game against an international team, LeagueGameFinder (league 00) only has the NBA team's row of it
+ONE_SIDED_GAME_ID = "0012400001"
+SEASON = "2024-25"
+PLAYERS_PER_TEAM = 13
+# players of every team in the CommonAllPlayers / CommonPlayerInfo fixtures
+ROSTER_PER_TEAM = 3
+
+# headers of a LeagueDashPlayerStats answer as stats.nba.com sends them today, nba_api's expected_data for it
+# is out of date (no NICKNAME / WNBA_FANTASY_PTS, an extra CFID / CFPARAMS) and helpers.ingest reads the real ones
+LEAGUE_DASH_HEADERS = [
+    "PLAYER_ID", "PLAYER_NAME", "NICKNAME", "TEAM_ID", "TEAM_ABBREVIATION", "AGE", "GP", "W", "L", "W_PCT", "MIN",
+    "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT", "OREB", "DREB", "REB", "AST", "TOV",
+    "STL", "BLK", "BLKA", "PF", "PFD", "PTS", "PLUS_MINUS", "NBA_FANTASY_PTS", "DD2", "TD3", "WNBA_FANTASY_PTS",
+    "GP_RANK", "W_RANK", "L_RANK", "W_PCT_RANK", "MIN_RANK", "FGM_RANK", "FGA_RANK", "FG_PCT_RANK", "FG3M_RANK",
+    "FG3A_RANK", "FG3_PCT_RANK", "FTM_RANK", "FTA_RANK", "FT_PCT_RANK", "OREB_RANK", "DREB_RANK", "REB_RANK",
+    "AST_RANK", "TOV_RANK", "STL_RANK", "BLK_RANK", "BLKA_RANK", "PF_RANK", "PFD_RANK", "PTS_RANK",
+    "PLUS_MINUS_RANK", "NBA_FANTASY_PTS_RANK", "DD2_RANK", "TD3_RANK", "WNBA_FANTASY_PTS_RANK",
+]
+
+
+# path of a fixture, `key` is the game id / player id / season it is for (None for the default one)
+def fixture_path(endpoint, key=None, directory=FIXTURES_DIR):
+    if key is None:
+        return os.path.join(directory, f"{endpoint}.json")
+    return os.path.join(directory, endpoint, f"{key}.json")
+
+
+def save(body, endpoint, key=None, directory=FIXTURES_DIR):
+    path = fixture_path(endpoint, key, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(body, f, separators=(",", ":"))
+
+
+# record real responses from stats.nba.com (needs network access): python -m benchmarks.fixtures --record
+def record(directory=FIXTURES_DIR):
+    from nba_api.stats.endpoints import (
+        BoxScoreTraditionalV2, CommonAllPlayers, CommonPlayerInfo, LeagueDashPlayerStats, LeagueGameFinder,
+    )
+
+    games = LeagueGameFinder(season_nullable=SEASON, league_id_nullable="00")
+    save(games.get_dict(), "leaguegamefinder", directory=directory)
+    for game_id in games.get_data_frames()[0]["GAME_ID"].unique()[:len(GAME_IDS)]:
+        save(BoxScoreTraditionalV2(game_id=game_id).get_dict(), "boxscoretraditionalv2", game_id, directory)
+
+    players = CommonAllPlayers(is_only_current_season=1)
+    save(players.get_dict(), "commonallplayers", directory=directory)
+    for player_id in players.get_data_frames()[0]["PERSON_ID"]:
+        save(CommonPlayerInfo(player_id=player_id).get_dict(), "commonplayerinfo", player_id, directory)
+
+    save(LeagueDashPlayerStats(season=SEASON).get_dict(), "leaguedashplayerstats", directory=directory)
+
+
+# one result set in the stats.nba.com format
+def result_set(name, headers, rows):
+    return {"name": name, "headers": headers, "rowSet": [[row[header] for header in headers] for row in rows]}
+
+
+# a value for a column we don't fill in on purpose, good enough for the code that doesn't look at it
+def filler(header, rng):
+    if header.endswith("_PCT"):
+        return round(rng.uniform(0.3, 0.6), 3)
+    if header.endswith("_RANK") or header.endswith("_ID") or header.endswith("_YEAR"):
+        return rng.randint(1, 500)
+    if header.endswith("_FLAG"):
+        return "Y"
+    return "x"
+
+
+def fill(headers, rng, **values):
+    return {header: values[header] if header in values else filler(header, rng) for header in headers}
+
+
+# made up responses in the exact shape of the real ones (headers come from nba_api itself, LeagueDashPlayerStats'
+# from LEAGUE_DASH_HEADERS),
+# used when stats.nba.com can't be reached: python -m benchmarks.fixtures --synthesize
+def synthesize(directory=FIXTURES_DIR, seed=0):
+    from nba_api.stats.endpoints import (
+        BoxScoreTraditionalV2, CommonAllPlayers, CommonPlayerInfo, LeagueGameFinder,
+    )
+    from nba_api.stats.static import teams as static_teams
+
+    rng = random.Random(seed)
+    teams = static_teams.get_teams()
+    players = []
+    for team in teams:
+        for i in range(ROSTER_PER_TEAM):
+            players.append({
+                "id": team["id"] * 100 + i, "team": team,
+                "first": f"Player{i}", "last": team["nickname"],
+            })
+
+    # LeagueGameFinder, every game twice (once for each team)
+    headers = LeagueGameFinder.expected_data["LeagueGameFinderResults"]
+    rows = []
+    for n, game_id in enumerate(GAME_IDS):
+        home, away = teams[2 * n], teams[2 * n + 1]
+        home_pts, away_pts = rng.randint(95, 130), rng.randint(95, 130)
+        if home_pts == away_pts:
+            home_pts += 1
+        for team, pts, other in [(home, home_pts, away_pts), (away, away_pts, home_pts)]:
+            rows.append(fill(
+                headers, rng, SEASON_ID="22024", TEAM_ID=team["id"], TEAM_ABBREVIATION=team["abbreviation"],
+                TEAM_NAME=team["full_name"], GAME_ID=game_id, GAME_DATE="2024-11-01",
+                MATCHUP=f"{home['abbreviation']} vs. {away['abbreviation']}", WL="W" if pts > other else "L",
+                MIN=240, PTS=pts, PLUS_MINUS=pts - other,
+            ))
+    # its own random numbers, so the fixtures after it come out the same as without it
+    rows.append(fill(
+        headers, random.Random(seed + 1), SEASON_ID="12024", TEAM_ID=teams[-1]["id"],
+        TEAM_ABBREVIATION=teams[-1]["abbreviation"], TEAM_NAME=teams[-1]["full_name"], GAME_ID=ONE_SIDED_GAME_ID,
+        GAME_DATE="2024-11-01", MATCHUP=f"{teams[-1]['abbreviation']} vs. MAC", WL="W", MIN=240, PTS=112, PLUS_MINUS=9,
+    ))
+    save({"resource": "leaguegamefinder", "resultSets": [result_set("LeagueGameFinderResults", headers, rows)]},
+         "leaguegamefinder", directory=directory)
+
+    # BoxScoreTraditionalV2 of every game
+    expected = BoxScoreTraditionalV2.expected_data
+    for n, game_id in enumerate(GAME_IDS):
+        player_rows, team_rows = [], []
+        for team_rank, team in enumerate([teams[2 * n], teams[2 * n + 1]]):
+            total = 0
+            for i in range(PLAYERS_PER_TEAM):
+                played = i < 10
+                fga, fg3a, fta = rng.randint(3, 20), rng.randint(0, 8), rng.randint(0, 8)
+                fgm, fg3m, ftm = rng.randint(1, fga), rng.randint(0, fg3a), rng.randint(0, fta)
+                pts = 2 * fgm + fg3m + ftm if played else None
+                total += pts or 0
+                stats = dict(
+                    MIN=f"{rng.randint(10, 40)}.000000:{rng.randint(0, 59):02d}", FGM=fgm, FGA=fga,
+                    FG_PCT=round(fgm / fga, 3), FG3M=fg3m, FG3A=fg3a, FG3_PCT=round(fg3m / fg3a, 3) if fg3a else 0.0,
+                    FTM=ftm, FTA=fta, FT_PCT=round(ftm / fta, 3) if fta else 0.0, OREB=rng.randint(0, 4),
+                    DREB=rng.randint(0, 10), AST=rng.randint(0, 10), STL=rng.randint(0, 3), BLK=rng.randint(0, 3),
+                    TO=rng.randint(0, 5), PF=rng.randint(0, 5), PTS=pts, PLUS_MINUS=rng.randint(-15, 15),
+                ) if played else {header: None for header in ["MIN", "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA", "FT_PCT", "OREB", "DREB", "AST", "STL", "BLK", "TO", "PF", "PTS", "PLUS_MINUS"]}
+                stats["REB"] = stats["OREB"] + stats["DREB"] if played else None
+                player_rows.append(fill(
+                    expected["PlayerStats"], rng, GAME_ID=game_id, TEAM_ID=team["id"],
+                    TEAM_ABBREVIATION=team["abbreviation"], TEAM_CITY=team["city"], PLAYER_ID=team["id"] * 100 + i,
+                    PLAYER_NAME=f"Player{i} {team['nickname']}", NICKNAME=f"Player{i}",
+                    START_POSITION=["F", "F", "C", "G", "G"][i] if i < 5 else "",
+                    COMMENT="" if played else "DNP - Coach's Decision", **stats,
+                ))
+            team_rows.append(fill(
+                expected["TeamStats"], rng, GAME_ID=game_id, TEAM_ID=team["id"], TEAM_NAME=team["nickname"],
+                TEAM_ABBREVIATION=team["abbreviation"], TEAM_CITY=team["city"], MIN="240.000000:00",
+                PTS=total + team_rank, PLUS_MINUS=0,
+            ))
+        bench_rows = [
+            fill(expected["TeamStarterBenchStats"], rng, GAME_ID=game_id, TEAM_ID=row["TEAM_ID"], STARTERS_BENCH=part)
+            for row in team_rows for part in ["Starters", "Bench"]
+        ]
+        save({"resource": "boxscore", "resultSets": [
+            result_set("PlayerStats", expected["PlayerStats"], player_rows),
+            result_set("TeamStats", expected["TeamStats"], team_rows),
+            result_set("TeamStarterBenchStats", expected["TeamStarterBenchStats"], bench_rows),
+        ]}, "boxscoretraditionalv2", game_id, directory)
+
+    # CommonAllPlayers and the CommonPlayerInfo of every player
+    headers = CommonAllPlayers.expected_data["CommonAllPlayers"]
+    rows = [fill(
+        headers, rng, PERSON_ID=p["id"], DISPLAY_LAST_COMMA_FIRST=f"{p['last']}, {p['first']}",
+        DISPLAY_FIRST_LAST=f"{p['first']} {p['last']}", ROSTERSTATUS=1, FROM_YEAR="2015", TO_YEAR="2024",
+        TEAM_ID=p["team"]["id"], TEAM_CITY=p["team"]["city"], TEAM_NAME=p["team"]["nickname"],
+        TEAM_ABBREVIATION=p["team"]["abbreviation"], GAMES_PLAYED_FLAG="Y",
+    ) for p in players]
+    save({"resource": "commonallplayers", "resultSets": [result_set("CommonAllPlayers", headers, rows)]},
+         "commonallplayers", directory=directory)
+
+    expected = CommonPlayerInfo.expected_data
+    for p in players:
+        info = fill(
+            expected["CommonPlayerInfo"], rng, PERSON_ID=p["id"], FIRST_NAME=p["first"], LAST_NAME=p["last"],
+            DISPLAY_FIRST_LAST=f"{p['first']} {p['last']}", BIRTHDATE=f"{rng.randint(1985, 2005)}-0{rng.randint(1, 9)}-15T00:00:00",
+            COUNTRY=rng.choice(["USA", "USA", "USA", "Canada", "France", "Serbia", "Australia"]),
+            JERSEY=str(rng.randint(0, 99)), POSITION=rng.choice(["Guard", "Forward", "Center", "Guard-Forward", "Forward-Center"]),
+            TEAM_ID=p["team"]["id"], TEAM_NAME=p["team"]["nickname"], TEAM_ABBREVIATION=p["team"]["abbreviation"],
+            TEAM_CITY=p["team"]["city"], GAMES_PLAYED_FLAG="Y",
+        )
+        save({"resource": "commonplayerinfo", "resultSets": [
+            result_set("CommonPlayerInfo", expected["CommonPlayerInfo"], [info]),
+            result_set("PlayerHeadlineStats", expected["PlayerHeadlineStats"],
+                       [fill(expected["PlayerHeadlineStats"], rng, PLAYER_ID=p["id"], TimeFrame=SEASON)]),
+            result_set("AvailableSeasons", expected["AvailableSeasons"], [{"SEASON_ID": "22024"}]),
+        ]}, "commonplayerinfo", p["id"], directory)
+
+    # LeagueDashPlayerStats of a season
+    headers = LEAGUE_DASH_HEADERS
+    rows = []
+    for p in players:
+        wins, losses = rng.randint(0, 60), rng.randint(1, 40)
+        values = {header: rng.randint(0, 500) for header in headers}
+        values.update(
+            PLAYER_ID=p["id"], PLAYER_NAME=f"{p['first']} {p['last']}", NICKNAME=p["first"], TEAM_ID=p["team"]["id"],
+            TEAM_ABBREVIATION=p["team"]["abbreviation"], AGE=rng.randint(19, 38), GP=wins + losses, W=wins, L=losses,
+            W_PCT=round(wins / (wins + losses), 3), MIN=round(rng.uniform(50, 3000), 2),
+            FG_PCT=round(rng.uniform(0.35, 0.6), 3), FG3_PCT=round(rng.uniform(0.25, 0.45), 3),
+            FT_PCT=round(rng.uniform(0.6, 0.9), 3), NBA_FANTASY_PTS=round(rng.uniform(0, 3000), 1),
+            WNBA_FANTASY_PTS=round(rng.uniform(0, 3000), 1),
+        )
+        rows.append(values)
+    save({"resource": "leaguedashplayerstats", "resultSets": [result_set("LeagueDashPlayerStats", headers, rows)]},
+         "leaguedashplayerstats", directory=directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the stats.nba.com response fixtures the replay server serves.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", action="store_true", help="record real responses (needs network access)")
+    mode.add_argument("--synthesize", action="store_true", help="make up responses in the real format")
+    parser.add_argument("--directory", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    if args.record:
+        record(args.directory)
+    else:
+        synthesize(args.directory)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import FIXTURES_DIR, fixture_path
+
+# query parameters that pick a specific fixture, in the order they are looked at
+KEY_PARAMETERS = ["GameID", "PlayerID", "Season"]
+
+
+# serves the recorded responses like stats.nba.com would: GET /stats/<endpoint>?<parameters>
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1].lower()
+        parameters = parse_qs(url.query)
+
+        path = find_fixture(self.server.fixtures, endpoint, parameters)
+        # pretend to be as slow as the real thing
+        time.sleep(self.server.latency)
+        self.server.count(endpoint)
+
+        if path is None:
+            self.send_error(404, f"no fixture for {endpoint}")
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        adapt = ADAPTERS.get(endpoint)
+        if adapt is not None:
+            body = adapt(body, parameters)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # keep the benchmark output clean
+    def log_message(self, format, *args):
+        pass
+
+
+# move the recorded games to the last day that was asked for, so every date the app asks about has games
+def redate_games(body, parameters):
+    date_to = parameters.get("DateTo", [""])[0]
+    if not date_to:
+        return body
+    month, day, year = date_to.split("/")
+    response = json.loads(body)
+    result = response["resultSets"][0]
+    date_column = result["headers"].index("GAME_DATE")
+    for row in result["rowSet"]:
+        row[date_column] = f"{year}-{month}-{day}"
+    return json.dumps(response).encode()
+
+
+# endpoints whose recorded responses are adjusted to the request before they are served
+ADAPTERS = {"leaguegamefinder": redate_games}
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures=FIXTURES_DIR, latency=0.0):
+        super().__init__(address, ReplayHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        # requests served per endpoint
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    # what nba_api's base url has to be set to, NBA_STATS_BASE_URL makes the app use it
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/stats/{{endpoint}}"
+
+
+# the fixture for a request: the one for its game/player/season if there is one, else the endpoint's default
+def find_fixture(directory, endpoint, parameters):
+    for key in KEY_PARAMETERS:
+        for value in parameters.get(key, []):
+            path = fixture_path(endpoint, value, directory)
+            if os.path.exists(path):
+                return path
+    path = fixture_path(endpoint, directory=directory)
+    return path if os.path.exists(path) else None
+
+
+# start a replay server on a background thread, port 0 picks a free one
+def start(latency=0.0, port=0, fixtures=FIXTURES_DIR):
+    server = ReplayServer(("127.0.0.1", port), fixtures, latency)
+    threading.Thread(target=server.serve_forever, name="replay", daemon=True).start()
+    return server
+
+
+# run it on its own, then point the app at it:
+# python -m benchmarks.replay --port 8765 --latency 0.5
+# NBA_STATS_BASE_URL="http://127.0.0.1:8765/stats/{endpoint}" streamlit run Main.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded stats.nba.com responses locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    server = ReplayServer(("127.0.0.1", args.port), args.fixtures, args.latency)
+    print(f"serving {args.fixtures} at {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1 @@
+# shared data loading and caching code used by Main.py and the pages
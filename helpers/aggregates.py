@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from helpers.cache import TieredCache
+from helpers.dataset import NON_STAT_COLUMNS
+
+# percentages that are recomputed from the made and attempted totals, and the scale the dataset uses for them
+RATIOS = {
+    "Field Goal %": ("Field Goals Made", "Field Goals Attempted", 100),
+    "Three-Pointers %": ("Three-Pointers Made", "Three-Pointers Attempted", 100),
+    "Free Throw %": ("Free Throws Made", "Free Throws Attempted", 1),
+}
+
+# aggregates by dataset version, they only change when the data is rebuilt so they are kept on disk too
+aggregate_cache = TieredCache("aggregates", max_entries=2)
+
+
+# sums, means (of the non missing values) and attempt weighted percentages of every stat for every season
+# all columns are done together: the rows are grouped by season once and every column is reduced in that same pass
+def compute_season_aggregates(store):
+    stats = [name for name in store.column_names if name not in NON_STAT_COLUMNS]
+    season_codes, seasons = pd.factorize(store.column("Season"))
+
+    # rows x stats matrix, sorted so every season is one block
+    order = np.argsort(season_codes, kind="stable")
+    matrix = np.column_stack([store.column(stat).astype(np.float64) for stat in stats])[order]
+    starts = np.searchsorted(season_codes[order], np.arange(len(seasons)))
+
+    present = ~np.isnan(matrix)
+    sums = np.add.reduceat(np.where(present, matrix, 0), starts, axis=0)
+    counts = np.add.reduceat(present, starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    index = pd.Index(seasons, name="Season")
+    sums = pd.DataFrame(sums, index=index, columns=stats)
+    means = pd.DataFrame(means, index=index, columns=stats)
+
+    ratios = pd.DataFrame(index=index)
+    for ratio, (made, attempted, scale) in RATIOS.items():
+        ratios[ratio] = (sums[made] / sums[attempted].replace(0, np.nan)) * scale
+
+    return {"sum": sums, "mean": means, "ratio": ratios}
+
+
+# the aggregates of a store, computed once per dataset version
+def season_aggregates(store):
+    return aggregate_cache.get_or_load(store.version, lambda: compute_season_aggregates(store))
@@ -0,0 +1,149 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from helpers.cache import TieredCache
+from helpers.upstream import fetch
+from helpers.warehouse import warehouse
+
+# how long a box score of a game that may still be going on stays cached, in seconds
+LIVE_TTL = 60
+
+logger = logging.getLogger(__name__)
+
+# box scores fetched ahead of time at once, the shared upstream rate limit still applies on top
+PREFETCH_WORKERS = 4
+
+# url for player pictures
+PLAYER_URL = "https://cdn.nba.com/headshots/nba/latest/1040x760/{}.png"
+
+# made and attempted columns of every shot type, shown as "made - attempted" under the name
+SHOTS = {"FG": ("FGM", "FGA"), "3PT": ("FG3M", "FG3A"), "FT": ("FTM", "FTA")}
+SHOT_COLUMNS = [column for shot in SHOTS.values() for column in shot]
+
+# box scores read from the warehouse stay in memory this long, they are on disk there already
+STORED_TTL = 3600
+
+# box scores by game id, at most this many are kept in memory, finished games are also kept on disk
+box_score_cache = TieredCache("boxscores", max_entries=64)
+
+
+# load in the box score of a game straight from stats.nba.com, one request gives both the player and the team stats
+def fetch_box_score(game_id):
+    # nba_api is only imported when we really have to ask upstream
+    from nba_api.stats.endpoints import BoxScoreTraditionalV2
+
+    box_score = fetch(BoxScoreTraditionalV2, game_id=game_id)
+    # 0 is the player stats, 1 is the team stats
+    return box_score[0], box_score[1]
+
+
+# whole played minutes of player rows, they come in like "25.000000:52" or "25:52", players who didn't play get 0
+def parse_minutes(minutes):
+    whole_minutes = pd.to_numeric(minutes.astype("string").str.partition(":")[0], errors="coerce")
+    return np.floor(whole_minutes.fillna(0).to_numpy(dtype=np.float64)).astype(np.int64)
+
+
+# the player stats of any number of games stacked into one frame, made ready for the box score in one go
+# shots stay numbers (format_shots turns them into text when they are shown), teams are told apart by TEAM_ID
+def transform_box_scores(players):
+    players = players.copy()
+    # create an image column, adding the players image url
+    players["IMAGE"] = players["PLAYER_ID"].map(PLAYER_URL.format)
+    # players who didn't play have no stats, count them as 0s so we can calculate with them
+    players[SHOT_COLUMNS] = players[SHOT_COLUMNS].fillna(0).astype(np.int64)
+    players["MIN"] = parse_minutes(players["MIN"])
+    # calculate some kind of efficiency, but its really simplified, it wont be shown either, the only use case is that to show the best player from each team, and I short them by this value
+    players["EFF"] = (
+        players["PTS"] + players["REB"] + players["AST"] + players["STL"] + players["BLK"] - players["TO"] - players["PF"]
+        + players["FG_PCT"] * players["FGA"] + players["FT_PCT"] * players["FTA"]
+    )
+    players = players.rename(columns={"PLUS_MINUS": "+/-"})
+    # keep every game together and the teams of a game in the same order the box score shows them
+    return players.sort_values(by=["GAME_ID", "TEAM_ID"], kind="stable")
+
+
+# the players of every team of a transformed box score, ordered by game and team id
+def split_teams(players):
+    return [team for _, team in players.groupby(["GAME_ID", "TEAM_ID"], sort=True)]
+
+
+# add the "made - attempted" text of every shot type, only for the rows that are about to be shown
+def format_shots(players):
+    players = players.copy()
+    for shot, (made, attempted) in SHOTS.items():
+        players[shot] = players[made].astype(str) + " - " + players[attempted].astype(str)
+    return players
+
+
+# played minutes of a team row, they come in like "240:00" or "240.000000:00"
+def team_minutes(minutes):
+    try:
+        return float(str(minutes).split(":")[0])
+    except ValueError:
+        return 0.0
+
+
+# a game is final when both teams played the full 240 minutes (or more with overtime) and it's not tied
+# a tied game at 240 minutes is heading into overtime
+def is_final(teams):
+    if len(teams) != 2 or teams["PTS"].isna().any():
+        return False
+    played_full_game = all(team_minutes(minutes) >= 240 for minutes in teams["MIN"])
+    return played_full_game and teams["PTS"].iloc[0] != teams["PTS"].iloc[1]
+
+
+# player and team stats of a game, fetched once and shared by every view of the box score page
+# backfilled games come from the local warehouse, only games that aren't stored yet are asked from upstream
+def load_box_score(game_id):
+    game_id = str(game_id)
+    stored = False
+
+    # one lookup per call, so a cold load counts as a single miss wherever it's found
+    def load():
+        nonlocal stored
+        box_score = warehouse.get(game_id)
+        if box_score is not None:
+            stored = True
+            return box_score
+        return fetch_box_score(game_id)
+
+    def ttl(box_score):
+        if stored:
+            return STORED_TTL
+        return None if is_final(box_score[1]) else LIVE_TTL
+
+    return box_score_cache.get_or_load(game_id, load, ttl=ttl)
+
+
+_prefetch_pool = None
+_prefetching = set()
+_prefetch_lock = threading.Lock()
+
+
+def _prefetch(game_id):
+    try:
+        load_box_score(game_id)
+    except Exception as error:
+        # the box score page will just try again when it's opened
+        logger.warning("prefetching box score %s failed: %s", game_id, error)
+    finally:
+        with _prefetch_lock:
+            _prefetching.discard(game_id)
+
+
+# start loading the box scores of these games in the background, so clicking through to one is served from memory
+# games already cached, stored or on their way are skipped, a click during the prefetch joins the same request
+def prefetch_box_scores(game_ids):
+    global _prefetch_pool
+    with _prefetch_lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+        for game_id in map(str, game_ids):
+            if game_id in _prefetching or game_id in box_score_cache or game_id in warehouse:
+                continue
+            _prefetching.add(game_id)
+            _prefetch_pool.submit(_prefetch, game_id)
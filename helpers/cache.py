@@ -0,0 +1,272 @@
+import contextlib
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# folder of the on-disk cache, lives next to the app unless pointed somewhere else
+CACHE_DIR = os.environ.get(
+    "NBA_APP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+
+# where the second level of every cache lives: "files" (pickle files, one process) or "sqlite" (shared by every
+# worker process of the host, see helpers/sqlite_cache.py)
+BACKEND = os.environ.get("NBA_APP_CACHE_BACKEND", "files")
+
+# how much the memory level of every cache of the process may hold together, in bytes
+MEMORY_BUDGET = int(os.environ.get("NBA_APP_CACHE_MEMORY_MB", "512")) * 1024 * 1024
+
+# marker for "nothing cached", so None can still be a cached value
+MISSING = object()
+
+
+# rough size of a cached value in bytes, dataframes count their strings too
+def estimate_size(value):
+    if hasattr(value, "memory_usage") and hasattr(value, "index"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+# one least recently used order over the memory level of every cache of the process
+# when the entries together go over the budget the oldest ones are dropped, whichever cache they are in
+# (they stay in the backend), every cache shares its lock so an eviction can reach into any of them
+class MemoryBudget:
+    def __init__(self, limit=MEMORY_BUDGET):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.caches = []
+        # (cache, key) -> size of the entry
+        self._order = OrderedDict()
+
+    # the lock has to be held by the caller for everything below
+    def touch(self, cache, key):
+        self._order.move_to_end((cache, key))
+
+    def add(self, cache, key, size):
+        self.remove(cache, key)
+        self._order[(cache, key)] = size
+        self.bytes += size
+        cache.bytes += size
+        # the newest entry is kept even when it's over the budget on its own, so it's loaded only once
+        while self.bytes > self.limit and len(self._order) > 1:
+            (oldest, oldest_key), _ = next(iter(self._order.items()))
+            self.evict(oldest, oldest_key)
+
+    def remove(self, cache, key):
+        size = self._order.pop((cache, key), None)
+        if size is not None:
+            self.bytes -= size
+            cache.bytes -= size
+
+    # drop an entry from memory to make room
+    def evict(self, cache, key):
+        self.remove(cache, key)
+        cache._memory.pop(key, None)
+        cache.evictions += 1
+        self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {"limit": self.limit, "bytes": self.bytes, "entries": len(self._order), "evictions": self.evictions}
+
+
+memory_budget = MemoryBudget()
+
+
+# pickle files on disk, only entries without a ttl are written (the rest only lives in memory)
+class FileBackend:
+    def __init__(self, name):
+        self.directory = os.path.join(CACHE_DIR, name)
+
+    # file of one key, keys are plain strings like dates or game ids
+    def _path(self, key):
+        safe_key = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(key))
+        return os.path.join(self.directory, f"{safe_key}.pkl")
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    # (seconds left or None for good, value), or MISSING
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return MISSING
+        try:
+            with open(path, "rb") as f:
+                return None, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return MISSING
+
+    # write to a temp file first and rename it, so a crash never leaves a half written entry behind
+    def set(self, key, value, ttl=None):
+        if ttl is not None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # a read-only disk only costs us persistence, the memory copy still works
+            pass
+
+    # nothing to coordinate between processes, loads in this process are already joined by upstream.fetch
+    def lease(self, key):
+        return contextlib.nullcontext()
+
+
+# the second level of a cache, picked by NBA_APP_CACHE_BACKEND
+def make_backend(name):
+    if BACKEND == "sqlite":
+        from helpers.sqlite_cache import SqliteBackend
+        return SqliteBackend(name)
+    return FileBackend(name)
+
+
+# two level cache: a dict in memory shared by every session of the process, and a backend on disk
+# with the file backend entries with a ttl only live in memory and entries without one are kept for good,
+# the sqlite backend keeps both (with their expiry) and shares them with every other process of the host
+# the memory level is bounded by the shared MemoryBudget and, per cache, by max_entries,
+# the least recently used entries are dropped first (they stay on disk)
+class TieredCache:
+    def __init__(self, name, max_entries=None, backend=None, budget=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.backend = backend if backend is not None else make_backend(name)
+        self.budget = budget if budget is not None else memory_budget
+        self._memory = OrderedDict()
+        self._lock = self.budget.lock
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        with self._lock:
+            self.budget.caches.append(self)
+
+    # is the key cached (in memory and not expired, or on disk), without counting it as a hit or miss
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                return True
+        return key in self.backend
+
+    # the value and where it was found ("memory", "disk" or None when it's not cached), nothing is counted
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._memory.move_to_end(key)
+                    self.budget.touch(self, key)
+                    return value, "memory"
+                # expired, forget it and look further
+                del self._memory[key]
+                self.budget.remove(self, key)
+
+        # not in memory, maybe an earlier run or another process already saved it
+        entry = self.backend.get(key)
+        if entry is not MISSING:
+            left, value = entry
+            size = estimate_size(value)
+            with self._lock:
+                self._remember(key, None if left is None else time.monotonic() + left, value, size)
+            return value, "disk"
+        return MISSING, None
+
+    def _count(self, level):
+        with self._lock:
+            if level is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += level == "disk"
+
+    def get(self, key, default=MISSING):
+        value, level = self._lookup(key)
+        self._count(level)
+        return default if level is None else value
+
+    def set(self, key, value, ttl=None):
+        expires = None if ttl is None else time.monotonic() + ttl
+        # sized outside the lock, a deep dataframe count can take a moment
+        size = estimate_size(value)
+        with self._lock:
+            self._remember(key, expires, value, size)
+        self.backend.set(key, value, ttl=ttl)
+
+    # put an entry in memory as the most recent one and drop the oldest ones over the limits
+    def _remember(self, key, expires, value, size):
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._memory) > self.max_entries:
+                self.budget.evict(self, next(iter(self._memory)))
+        self.budget.add(self, key, size)
+
+    # return the cached value or load it, ttl can be a function of the loaded value
+    # only one process of the host loads a key at a time, the others wait for its result instead of loading it too
+    def get_or_load(self, key, loader, ttl=None):
+        value, level = self._lookup(key)
+        if level is None:
+            with self.backend.lease(key):
+                # whoever held the lease before us may have stored it by now
+                value, level = self._lookup(key)
+                if level is None:
+                    value = loader()
+                    self.set(key, value, ttl=ttl(value) if callable(ttl) else ttl)
+        self._count(level)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+            }
+
+
+# the stats of every cache of the process and of the memory budget they share
+def cache_stats():
+    with memory_budget.lock:
+        caches = list(memory_budget.caches)
+    return {"budget": memory_budget.stats(), "caches": [cache.stats() for cache in caches]}
+
+
+# cache a function's results in a TieredCache by its arguments, a drop-in for st.cache_data that works
+# outside of streamlit and, with the sqlite backend, is shared by every worker process of the host
+def memoize(name, ttl=None, max_entries=None):
+    def decorator(function):
+        cache = TieredCache(name, max_entries=max_entries)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+            return cache.get_or_load(key, lambda: function(*args, **kwargs), ttl=ttl)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
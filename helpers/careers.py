@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from helpers.aggregates import RATIOS
+from helpers.dataset import ID_COLUMN, NON_STAT_COLUMNS, PER_GAME, widen
+from helpers.leaders import top_rows
+
+# season totals that add up over a career, everything else (per game stats, percentages) is recomputed from these
+TOTAL_COLUMNS = [
+    "Wins", "Losses", "Minutes Played", "Field Goals Made", "Field Goals Attempted", "Three-Pointers Made",
+    "Three-Pointers Attempted", "Free Throws Made", "Free Throws Attempted", "Offensive Rebounds",
+    "Defensive Rebounds", "Total Rebounds", "Assists", "Turnovers", "Steals", "Blocks",
+    "Blocked Field Goal Attempts", "Personal Fouls", "Personal Fouls Drawn", "Points Scored",
+    "Plus-Minus Rating", "NBA Fantasy Points", "Double-Doubles", "Triple-Doubles", "Total Games",
+]
+
+# where the columns the averages are made from are among the totals
+GAMES = TOTAL_COLUMNS.index("Total Games")
+PER_GAME_TOTALS = [TOTAL_COLUMNS.index(total) for total in PER_GAME.values()]
+RATIO_MADE = [TOTAL_COLUMNS.index(made) for made, _, _ in RATIOS.values()]
+RATIO_ATTEMPTED = [TOTAL_COLUMNS.index(attempted) for _, attempted, _ in RATIOS.values()]
+RATIO_SCALES = np.array([scale for _, _, scale in RATIOS.values()], dtype=np.float64)
+AVERAGE_COLUMNS = list(PER_GAME) + list(RATIOS)
+
+
+# every player's rows of the dataset, built once per dataset
+# players are told apart by id, not by name, and picked by a label: their name, with their seasons (and id) added
+# when somebody else had the same name
+# the rows are sorted by player and then by season, so a player's rows are one slice: order[offsets[i]:offsets[i + 1]]
+class CareerIndex:
+    def __init__(self, store):
+        self.version = store.version
+        self._store = store
+
+        codes, self._ids = pd.factorize(store.column(ID_COLUMN))
+        seasons = store.column("Season")
+        # seasons look like 1996-97, so text order is also time order
+        self.order = np.lexsort((seasons, codes))
+        self.offsets = np.searchsorted(codes[self.order], np.arange(len(self._ids) + 1))
+        self._codes = {label: code for code, label in enumerate(self._labels(store.column("Name"), seasons))}
+        # every player's label, alphabetically for the select boxes
+        self.names = sorted(self._codes)
+
+        self.stats = [name for name in store.column_names if name not in NON_STAT_COLUMNS]
+        # season totals in player order, a career total is the sum of one block of rows
+        self._totals = np.column_stack([store.column(stat).astype(np.float64) for stat in TOTAL_COLUMNS])[self.order]
+
+    # label of every player in code order: the name of their latest season, made unique with the seasons and the id
+    def _labels(self, names, seasons):
+        first, last = self.order[self.offsets[:-1]], self.order[self.offsets[1:] - 1]
+        labels = names[last].astype(object)
+        # a name somebody else had too gets the seasons
+        for code in np.flatnonzero(pd.Series(labels).duplicated(keep=False).to_numpy()):
+            span = seasons[first[code]] if first[code] == last[code] else f"{seasons[first[code]]} to {seasons[last[code]]}"
+            labels[code] = f"{labels[code]} ({span})"
+        # and the id when even the seasons are the same (two Tony Mitchells in 2013-14)
+        for code in np.flatnonzero(pd.Series(labels).duplicated(keep=False).to_numpy()):
+            labels[code] = f"{labels[code]} #{self._ids[code]}"
+        return list(labels)
+
+    # stats.nba.com id of a player
+    def player_id(self, name):
+        return int(self._ids[self._codes[name]])
+
+    def __contains__(self, name):
+        return name in self._codes
+
+    # a player's block of the sorted rows
+    def _bounds(self, name):
+        code = self._codes[name]
+        return self.offsets[code], self.offsets[code + 1]
+
+    # row ids of a player's seasons, oldest first
+    def rows(self, name):
+        start, end = self._bounds(name)
+        return self.order[start:end]
+
+    # season by season lines of a player, indexed by season
+    def seasons(self, name, columns=None):
+        rows = self.rows(name)
+        columns = self.stats if columns is None else columns
+        return pd.DataFrame(
+            {column: widen(self._store.column(column)[rows]) for column in columns},
+            index=pd.Index(self._store.column("Season")[rows], name="Season"),
+        )
+
+    # career totals of a player as a plain array in TOTAL_COLUMNS order
+    def _career_totals(self, name):
+        start, end = self._bounds(name)
+        return np.nansum(self._totals[start:end], axis=0)
+
+    # career totals of a player
+    def totals(self, name):
+        return pd.Series(self._career_totals(name), index=TOTAL_COLUMNS, name=name)
+
+    # career per game averages and percentages of a player, made from the totals like the season ones are
+    def averages(self, name):
+        totals = self._career_totals(name)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per_game = np.round(totals[PER_GAME_TOTALS] / totals[GAMES], 1)
+            ratios = totals[RATIO_MADE] / totals[RATIO_ATTEMPTED] * RATIO_SCALES
+        return pd.Series(np.concatenate([per_game, ratios]), index=AVERAGE_COLUMNS, name=name)
+
+    # a player's n best seasons in a stat (lowest when ascending), seasons without a value are left out
+    def best_seasons(self, name, stat, n=3, ascending=False):
+        rows = self.rows(name)
+        best = top_rows(rows, self._store.column(stat)[rows].astype(np.float64), n, ascending)
+        return pd.Series(
+            widen(self._store.column(stat)[best]),
+            index=pd.Index(self._store.column("Season")[best], name="Season"),
+            name=stat,
+        )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# the career index of a store, built on first use and kept as long as the data doesn't change
+def get_career_index(store):
+    with _indexes_lock:
+        index = _indexes.get(store.version)
+        if index is None:
+            _indexes.clear()
+            index = _indexes[store.version] = CareerIndex(store)
+        return index
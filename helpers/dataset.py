@@ -0,0 +1,205 @@
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# the csv made by data.ipynb and the columnar copy of it the pages read
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, "combined_nba_stats.csv")
+ARROW_PATH = os.path.join(ROOT, "combined_nba_stats.arrow")
+
+# compact schema of the dataset: counts are int16, every other stat is float32,
+# text with few different values is a category (a dictionary in the arrow file), the rest stays plain text
+TEXT_COLUMNS = ["IMAGE"]
+CATEGORY_COLUMNS = ["Name", "Season"]
+# stats.nba.com's id of the player, names aren't unique (there are two Marcus Williams in 2007-08) but this is
+ID_COLUMN = "Player ID"
+# columns that say whose season a row is, every other column is a stat
+NON_STAT_COLUMNS = TEXT_COLUMNS + CATEGORY_COLUMNS + [ID_COLUMN]
+# columns that count something, so they are always whole numbers
+COUNT_COLUMNS = [
+    "Wins", "Losses", "Field Goals Made", "Field Goals Attempted", "Three-Pointers Made",
+    "Three-Pointers Attempted", "Free Throws Made", "Free Throws Attempted", "Offensive Rebounds",
+    "Defensive Rebounds", "Total Rebounds", "Assists", "Turnovers", "Steals", "Blocks",
+    "Blocked Field Goal Attempts", "Personal Fouls", "Personal Fouls Drawn", "Points Scored",
+    "Plus-Minus Rating", "Double-Doubles", "Triple-Doubles", "Total Games",
+]
+
+
+# every season we have data for, 1996-97 is the first one the stats endpoint has
+SEASONS = [f"{year}-{(year + 1) % 100:02d}" for year in range(1996, 2025)]
+
+# per game columns and the season totals they are made from
+PER_GAME = {
+    "Minutes / Game": "Minutes Played",
+    "FG Made / Game": "Field Goals Made",
+    "FG Attempted / Game": "Field Goals Attempted",
+    "3PTs Made / Game": "Three-Pointers Made",
+    "3PTs Attempted / Game": "Three-Pointers Attempted",
+    "FTs Made / Game": "Free Throws Made",
+    "FTs Attempted / Game": "Free Throws Attempted",
+    "Offensive Rebounds / Game": "Offensive Rebounds",
+    "Defensive Rebounds / Game": "Defensive Rebounds",
+    "Rebounds / Game": "Total Rebounds",
+    "Assists / Game": "Assists",
+    "Turnovers / Game": "Turnovers",
+    "Steals / Game": "Steals",
+    "Blocks / Game": "Blocks",
+    "Blocked FG Attempts / Game": "Blocked Field Goal Attempts",
+    "Personal Fouls / Game": "Personal Fouls",
+    "Personal Fouls Drawn / Game": "Personal Fouls Drawn",
+    "Points / Game": "Points Scored",
+    "Plus-Minus / Game": "Plus-Minus Rating",
+}
+
+
+# pandas type of a column in the compact schema
+def column_dtype(name):
+    if name in TEXT_COLUMNS:
+        return str
+    if name in CATEGORY_COLUMNS:
+        return "category"
+    if name == ID_COLUMN:
+        return np.int64
+    if name in COUNT_COLUMNS:
+        return np.int16
+    return np.float32
+
+
+# cast a dataframe to the compact schema
+def apply_schema(data):
+    return data.astype({name: column_dtype(name) for name in data.columns})
+
+
+# float32 values as float64 for showing them, going through their shortest text form so 32.9 doesn't show up as 32.900001
+def widen(values):
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values
+    return values.astype(str).astype(np.float64)
+
+
+# typed arrow column for one dataframe column
+def to_arrow_column(name, values):
+    if name in TEXT_COLUMNS:
+        return pa.array(values.astype(str).to_numpy(dtype=object), type=pa.string())
+    if name in CATEGORY_COLUMNS:
+        return pa.array(values.astype(str).to_numpy(dtype=object), type=pa.string()).dictionary_encode()
+    # numbers are built from numpy so missing percentages stay NaN instead of null, that keeps reads zero copy
+    return pa.array(values.to_numpy(dtype=column_dtype(name)))
+
+
+# player ids from the headshot links, they end in <id>.png
+def player_ids(images):
+    return pd.Series(images).str.extract(r"/(\d+)\.png$", expand=False).astype(np.int64)
+
+
+# convert the csv into an uncompressed arrow ipc file (uncompressed so it can be memory mapped)
+def convert(csv_path=CSV_PATH, arrow_path=ARROW_PATH):
+    data = pd.read_csv(csv_path)
+    # csvs made before the id was kept still have it in the image link
+    if ID_COLUMN not in data.columns:
+        data[ID_COLUMN] = player_ids(data["IMAGE"]).to_numpy()
+    table = pa.table({name: to_arrow_column(name, data[name]) for name in data.columns})
+    # remember which csv it was made from, so a new csv gets converted again
+    table = table.replace_schema_metadata({"source": source_signature(csv_path)})
+    return write_table(table, arrow_path)
+
+
+# write a table as an uncompressed arrow ipc file, through a temp file so readers never see half of it
+def write_table(table, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+    return path
+
+
+# the "source" metadata of an arrow file, what it was made from
+def source_of(path):
+    with pa.memory_map(path, "r") as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    return metadata.get(b"source", b"").decode()
+
+
+# size and modification time of the csv
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+# the season stats memory mapped from the arrow file, columns are only turned into numpy/pandas when asked for
+class StatsStore:
+    def __init__(self, path=ARROW_PATH):
+        self.path = path
+        # the table's buffers point straight into the mapped file, nothing is read until it's used
+        self._source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(self._source).read_all()
+        stat = os.stat(path)
+        # changes whenever the file is rebuilt, used as a key for anything derived from the data
+        self.version = f"{stat.st_size}-{stat.st_mtime_ns}"
+        self._columns = {}
+        self._frame = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def column_names(self):
+        return self.table.column_names
+
+    # one column as a numpy array, numeric columns are views of the mapped file
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            chunked = self.table.column(name)
+            if pa.types.is_dictionary(chunked.type):
+                values = chunked.combine_chunks().dictionary_decode().to_numpy(zero_copy_only=False)
+            else:
+                values = chunked.to_numpy()
+            self._columns[name] = values
+        return values
+
+    # the data as a dataframe, built once per process and shared by every session
+    def frame(self, columns=None):
+        if columns is not None:
+            return self.table.select(list(columns)).to_pandas()
+        with self._lock:
+            if self._frame is None:
+                self._frame = self.table.to_pandas()
+            return self._frame
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# open the store once per process, converting the csv first if the arrow file is missing or out of date
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if needs_conversion():
+                convert()
+            _store = StatsStore()
+        return _store
+
+
+def needs_conversion(csv_path=CSV_PATH, arrow_path=ARROW_PATH):
+    if not os.path.exists(arrow_path):
+        return True
+    if not os.path.exists(csv_path):
+        return False
+    return source_of(arrow_path) != source_signature(csv_path)
+
+
+# one-shot conversion from the command line: python -m helpers.dataset [csv] [arrow]
+if __name__ == "__main__":
+    print(convert(*sys.argv[1:3]))
@@ -0,0 +1,113 @@
+import datetime
+from datetime import datetime as dt
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from helpers.cache import TieredCache
+from helpers.upstream import fetch
+
+# how long a slate that can still change (today's games, games still in progress) stays cached, in seconds
+LIVE_TTL = 60
+
+# games are scheduled in US Eastern time, whatever time zone the server is in
+EASTERN = ZoneInfo("America/New_York")
+# the late games of a day end after midnight in the east, a day is only settled this long after it is over there
+SETTLE_AFTER = datetime.timedelta(hours=12)
+
+# url for team logos
+TEAM_URL = "https://cdn.nba.com/logos/nba/{}/global/L/logo.svg"
+# url for games (recap)
+GAME_URL = "https://www.nba.com/game/cle-vs-det-{}%3Fwatch?watchRecap=true"
+
+# the columns of a game the score box needs, read in one go per game
+SCORE_BOX_COLUMNS = ["GAME_ID", "IMAGE_x", "TEAM_ABBREVIATION_x", "PTS_x", "IMAGE_y", "TEAM_ABBREVIATION_y", "PTS_y", "RECAP"]
+
+# game results by date, finished days are kept on disk for good
+game_cache = TieredCache("games")
+
+
+# turn the two rows of every game (one from each team's perspective) into one row, 1st team's columns end in _x, 2nd team's in _y
+# it's one grouped reshape: take the first and the last row of each game and pivot them side by side
+# a game with only one team's row (an NBA team against an international one in the preseason) shows that row on both sides
+def pair_games(rows):
+    rows = rows.drop(columns=["SEASON_ID"])
+    columns = [column for column in rows.columns if column != "GAME_ID"]
+    if rows.empty:
+        return pd.DataFrame(columns=["GAME_ID"] + [f"{column}{side}" for side in ("_x", "_y") for column in columns])
+
+    grouped = rows.groupby("GAME_ID", sort=False)
+    first = rows[grouped.cumcount() == 0].assign(SIDE="_x")
+    last = rows[grouped.cumcount(ascending=False) == 0].assign(SIDE="_y")
+    games = pd.concat([first, last]).pivot(index="GAME_ID", columns="SIDE", values=columns)
+    games.columns = [f"{column}{side}" for column, side in games.columns]
+    # the pivot mixes every column into one block, give every column back the type it came with
+    games = games.astype({f"{column}{side}": rows[column].dtype for column in columns for side in ("_x", "_y")})
+    # keep the games in the order upstream sent them
+    games = games.reindex(rows["GAME_ID"].unique()).reset_index()
+    return games
+
+
+# logo and recap links of the paired games
+def add_links(games):
+    # set the logo url for the 1st team
+    games["IMAGE_x"] = games["TEAM_ID_x"].map(TEAM_URL.format)
+    # set the logo url for the 2nd team
+    games["IMAGE_y"] = games["TEAM_ID_y"].map(TEAM_URL.format)
+    # set the game url for the recap (same for both teams who play against each other)
+    games["RECAP"] = games["GAME_ID"].map(GAME_URL.format)
+    return games
+
+
+# load in every game between two dates (both included) straight from stats.nba.com with one request
+def fetch_game_range(date_from, date_to):
+    # nba_api is only imported when we really have to ask upstream, cache hits never pay for it
+    from nba_api.stats.endpoints import leaguegamefinder
+
+    # load in the games data (every game occures twice in both team's perspective), 00 means NBA
+    gamefinder = fetch(
+        leaguegamefinder.LeagueGameFinder,
+        date_from_nullable=date_from.strftime("%m/%d/%Y"),
+        date_to_nullable=date_to.strftime("%m/%d/%Y"),
+        league_id_nullable="00",
+    )
+    return add_links(pair_games(pd.DataFrame(gamefinder[0])))
+
+
+# a day is final once it is settled in Eastern time and every game on it has a winner,
+# before that a game that ends after midnight may not be listed yet, and a final day is cached for good
+def is_final(date, games, now=None):
+    now = now or datetime.datetime.now(EASTERN)
+    settled_at = datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time(), EASTERN) + SETTLE_AFTER
+    if now < settled_at:
+        return False
+    return bool(games["WL_x"].notna().all()) if "WL_x" in games else True
+
+
+# every day between two dates, both included
+def days_between(date_from, date_to):
+    return [date_from + datetime.timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+
+# the games of every day between two dates, as {date: games}
+# days we already have come from the cache, the missing ones are fetched with one ranged request and split into per day entries
+def load_game_range(date_from, date_to):
+    days = days_between(date_from, date_to)
+    results = {day: game_cache.get(day.isoformat(), None) for day in days}
+    missing = [day for day, games in results.items() if games is None]
+
+    if missing:
+        games = fetch_game_range(missing[0], missing[-1])
+        for day in days_between(missing[0], missing[-1]):
+            day_games = games[games["GAME_DATE_x"] == day.isoformat()].reset_index(drop=True)
+            # finished days never change so they don't expire, anything else is refreshed after a minute
+            game_cache.set(day.isoformat(), day_games, ttl=None if is_final(day, day_games) else LIVE_TTL)
+            if day in results:
+                results[day] = day_games
+    return results
+
+
+# load in games for the chosen day (mm/dd/YYYY), served from the cache when we already have it
+def load_game_results(day):
+    date = dt.strptime(day, "%m/%d/%Y").date()
+    return load_game_range(date, date)[date]
@@ -0,0 +1,226 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+# columns of a guess, in the order they are shown
+COMPARED_COLUMNS = ["NAME", "TEAM", "POSITION", "AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"]
+# the numeric ones, for them a wrong guess also tells if the solution is higher or lower
+NUMERIC_COLUMNS = ["AGE", "JERSEY"]
+
+# verdict of one attribute: wrong, exact, the solution is higher than the guess, the solution is lower than the guess
+WRONG, EXACT, HIGHER, LOWER = 0, 1, 2, 3
+
+# background colour of every verdict (green, yellow for higher, red for lower)
+VERDICT_STYLES = np.array(["", "background-color: #2E8B57", "background-color: #a08a06", "background-color: #B22222"])
+
+# difficulty levels of a solution, from the fewest to the most players sharing its answers
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+_numeric = np.isin(COMPARED_COLUMNS, NUMERIC_COLUMNS)
+
+
+# verdicts of a guessed player against the solution, one per compared column, both are one row frames
+def compare(guess, solution):
+    guessed = guess[COMPARED_COLUMNS].to_numpy(dtype=object)[0]
+    answer = solution[COMPARED_COLUMNS].to_numpy(dtype=object)[0]
+
+    verdicts = np.where(guessed == answer, EXACT, WRONG).astype(np.int8)
+
+    # higher/lower of the numeric columns in one go
+    guessed_numbers = guessed[_numeric].astype(np.float64)
+    answer_numbers = answer[_numeric].astype(np.float64)
+    verdicts[_numeric] = np.select(
+        [np.abs(guessed_numbers - answer_numbers) < 0.01, guessed_numbers < answer_numbers],
+        [EXACT, HIGHER],
+        LOWER,
+    )
+    return verdicts
+
+
+# the guesses of a game: one row per guess (latest first) and the verdicts of all of them as a single int8 array
+class GuessHistory:
+    def __init__(self):
+        self.ids = []
+        self.rows = pd.DataFrame(columns=COMPARED_COLUMNS + ["IMAGE"])
+        self.verdicts = np.empty((0, len(COMPARED_COLUMNS)), dtype=np.int8)
+        # the compared values of every guess as plain objects, for narrowing the candidates without pandas
+        self.values = np.empty((0, len(COMPARED_COLUMNS)), dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def last_id(self):
+        return self.ids[0] if self.ids else None
+
+    @property
+    def solved(self):
+        return len(self.verdicts) > 0 and bool((self.verdicts[0] == EXACT).all())
+
+    # record a new guess, only that one is compared, the earlier verdicts are kept as they are
+    def add(self, id, guess, solution):
+        self.ids.insert(0, id)
+        self.rows = pd.concat([guess, self.rows]) if len(self.rows) else guess
+        self.verdicts = np.vstack([compare(guess, solution), self.verdicts])
+        self.values = np.vstack([guess[COMPARED_COLUMNS].to_numpy(dtype=object)[:1], self.values])
+
+    # every guess as one styled table, the colours come straight from the verdict array
+    def styled(self, limit=None):
+        rows = self.rows[COMPARED_COLUMNS].iloc[:limit].reset_index(drop=True)
+        styles = pd.DataFrame(VERDICT_STYLES[self.verdicts[:limit]], index=rows.index, columns=COMPARED_COLUMNS)
+        return rows.style.apply(lambda _: styles, axis=None).format(precision=1)
+
+
+# the players behind the set bits of a candidate bitset, as positions in the index
+def positions(bits, size):
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder="little")[:size])
+
+
+# every active player as one bit of a python int, so a set of candidates is a single int
+# a verdict narrows the candidates with one bitwise and: text columns keep a bitset per value,
+# numeric columns keep their distinct values sorted and the bitset of everybody below each of them
+class CandidateIndex:
+    def __init__(self, players):
+        self.ids = players.index.to_numpy()
+        self.names = players["NAME"].to_numpy()
+        self.size = len(players)
+        self.all = (1 << self.size) - 1
+        self._positions = {id: position for position, id in enumerate(self.ids)}
+
+        self._values = {}
+        self._equal = {}
+        self._distinct = {}
+        self._below = {}
+        for column in COMPARED_COLUMNS:
+            values = players[column].astype(np.int64) if column in NUMERIC_COLUMNS else players[column]
+            self._values[column] = values.to_numpy()
+            equal = {}
+            for position, value in enumerate(self._values[column]):
+                equal[value] = equal.get(value, 0) | (1 << position)
+            self._equal[column] = equal
+        for column in NUMERIC_COLUMNS:
+            distinct = sorted(self._equal[column])
+            below = [0]
+            for value in distinct:
+                below.append(below[-1] | self._equal[column][value])
+            self._distinct[column] = distinct
+            self._below[column] = below
+
+        self._opening = None
+
+    def position(self, id):
+        return self._positions.get(int(id))
+
+    # the players a verdict on a guessed value in a column leaves in
+    def matching(self, column, verdict, value):
+        if column in NUMERIC_COLUMNS:
+            value = int(value)
+        if verdict == EXACT:
+            return self._equal[column].get(value, 0)
+        if verdict == WRONG:
+            return self.all & ~self._equal[column].get(value, 0)
+        distinct, below = self._distinct[column], self._below[column]
+        if verdict == HIGHER:
+            return self.all & ~below[bisect_right(distinct, value)]
+        return below[bisect_left(distinct, value)]
+
+    # the candidates that agree with the verdicts of one guess, values are the guess's values in COMPARED_COLUMNS order
+    def narrow(self, candidates, values, verdicts):
+        for column, value, verdict in zip(COMPARED_COLUMNS, values, verdicts):
+            candidates &= self.matching(column, verdict, value)
+        return candidates
+
+    # the candidates left after every guess of a game
+    def remaining(self, history):
+        candidates = self.all
+        for values, verdicts in zip(history.values, history.verdicts):
+            candidates = self.narrow(candidates, values, verdicts)
+        return candidates
+
+    def count(self, candidates):
+        return candidates.bit_count()
+
+    # the verdicts of guessing one indexed player when the solution is another one
+    def verdicts(self, guess, solution):
+        result = []
+        for column in COMPARED_COLUMNS:
+            guessed, answer = self._values[column][guess], self._values[column][solution]
+            if guessed == answer:
+                result.append(EXACT)
+            elif column not in NUMERIC_COLUMNS:
+                result.append(WRONG)
+            else:
+                result.append(HIGHER if guessed < answer else LOWER)
+        return result
+
+    # how a guess splits the candidates: one bitset per combination of verdicts it can get
+    def partition(self, guess, candidates):
+        parts = [candidates]
+        for column in COMPARED_COLUMNS:
+            value = self._values[column][guess]
+            outcomes = (EXACT, HIGHER, LOWER) if column in NUMERIC_COLUMNS else (EXACT, WRONG)
+            splits = [self.matching(column, verdict, value) for verdict in outcomes]
+            parts = [part & split for part in parts for split in splits if part & split]
+        return parts
+
+    # the candidate to guess next: the one that leaves the fewest candidates on average
+    def best_guess(self, candidates):
+        if candidates == self.all and self._opening is not None:
+            return self._opening[0]
+        total = self.count(candidates)
+        best, best_score = None, None
+        for guess in positions(candidates, self.size):
+            score = sum(part.bit_count() ** 2 for part in self.partition(guess, candidates)) / total
+            if best_score is None or score < best_score:
+                best, best_score = guess, score
+        return best
+
+    # play a game against a solution, returns the positions guessed, the last one is the solution
+    def solve(self, solution, max_guesses=None):
+        candidates = self.all
+        guesses = []
+        while candidates and (max_guesses is None or len(guesses) < max_guesses):
+            guess = self.best_guess(candidates)
+            guesses.append(guess)
+            if guess == solution:
+                break
+            values = [self._values[column][guess] for column in COMPARED_COLUMNS]
+            candidates = self.narrow(candidates, values, self.verdicts(guess, solution))
+        return guesses
+
+    # the solver's first guess and how many players share each player's answers to it
+    # a player who shares them with few others is easy to find, one in a big crowd is hard
+    def opening(self):
+        if self._opening is None:
+            guess = self.best_guess(self.all)
+            crowd = np.zeros(self.size, dtype=np.int64)
+            for part in self.partition(guess, self.all):
+                crowd[positions(part, self.size)] = part.bit_count()
+            self._opening = (guess, crowd)
+        return self._opening
+
+    # a random player id of a difficulty: the easiest, middle or hardest third by the size of their crowd
+    def pick_solution(self, difficulty, rng=np.random):
+        _, crowd = self.opening()
+        order = np.argsort(crowd, kind="stable")
+        third = DIFFICULTIES.index(difficulty)
+        pool = np.array_split(order, len(DIFFICULTIES))[third]
+        return self.ids[rng.choice(pool)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# the candidate index of a player table (None while there is no table), made again when the table is rebuilt
+def get_candidate_index(players):
+    global _index
+    if players is None:
+        return None
+    with _index_lock:
+        if _index is None or _index[0] is not players:
+            _index = (players, CandidateIndex(players))
+        return _index[1]
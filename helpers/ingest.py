@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from helpers.cache import TieredCache
+from helpers.dataset import CSV_PATH, ID_COLUMN, PER_GAME, SEASONS, apply_schema, convert
+from helpers import upstream
+
+# prepared seasons, saved after each one is done so a failed run picks up where it stopped
+season_checkpoints = TieredCache("seasons")
+
+
+def load_data(season, endpoint=None):
+    # the endpoint can be swapped for a local stub, it only needs the same arguments (plus timeout) and get_data_frames()
+    if endpoint is None:
+        from nba_api.stats.endpoints import LeagueDashPlayerStats as endpoint
+
+    # read in the correct season's stats, through the shared upstream client (rate limited, retried)
+    player_stats_readin = upstream.fetch(endpoint, season=season, season_type_all_star="Regular Season")
+
+    # convert it into a dataframe
+    players_raw_df = player_stats_readin[0]
+
+    # convert the dataframe to a pandas dataframe
+    players_df = pd.DataFrame(players_raw_df)
+
+    # drop the columns that are not needed
+    players_df = players_df.drop(columns=["NICKNAME", "WNBA_FANTASY_PTS", "WNBA_FANTASY_PTS_RANK"])
+    return players_df
+
+
+def prepare_dataset(data):
+    # add picture links to columns
+    url = "https://cdn.nba.com/headshots/nba/latest/1040x760/{}.png"
+    # set the image column
+    data["IMAGE"] = data["PLAYER_ID"].apply(lambda pid: url.format(pid))
+
+
+    # choose which columns the drop
+    columns_to_drop = [
+        "TEAM_ID", "TEAM_ABBREVIATION", "AGE",
+        "GP_RANK", "W_RANK", "L_RANK", "W_PCT_RANK", "MIN_RANK", "FGM_RANK",
+        "FGA_RANK", "FG_PCT_RANK", "FG3M_RANK", "FG3A_RANK", "FG3_PCT_RANK",
+        "FTM_RANK", "FTA_RANK", "FT_PCT_RANK", "OREB_RANK", "DREB_RANK",
+        "REB_RANK", "AST_RANK", "TOV_RANK", "STL_RANK", "BLK_RANK", "BLKA_RANK",
+        "PF_RANK", "PFD_RANK", "PTS_RANK", "PLUS_MINUS_RANK",
+        "NBA_FANTASY_PTS_RANK", "DD2_RANK", "TD3_RANK", "GP", "W_PCT"
+    ]
+    # rename the columns for better user experience and understanding
+    rename_dict = {
+        "PLAYER_NAME": "Name",
+        "PLAYER_ID": ID_COLUMN,
+        "W": "Wins",
+        "L": "Losses",
+        "MIN": "Minutes Played",
+        "FGM": "Field Goals Made",
+        "FGA": "Field Goals Attempted",
+        "FG_PCT": "Field Goal %",
+        "FG3M": "Three-Pointers Made",
+        "FG3A": "Three-Pointers Attempted",
+        "FG3_PCT": "Three-Pointers %",
+        "FTM": "Free Throws Made",
+        "FTA": "Free Throws Attempted",
+        "FT_PCT": "Free Throw %",
+        "OREB": "Offensive Rebounds",
+        "DREB": "Defensive Rebounds",
+        "REB": "Total Rebounds",
+        "AST": "Assists",
+        "TOV": "Turnovers",
+        "STL": "Steals",
+        "BLK": "Blocks",
+        "BLKA": "Blocked Field Goal Attempts",
+        "PF": "Personal Fouls",
+        "PFD": "Personal Fouls Drawn",
+        "PTS": "Points Scored",
+        "PLUS_MINUS": "Plus-Minus Rating",
+        "NBA_FANTASY_PTS": "NBA Fantasy Points",
+        "DD2": "Double-Doubles",
+        "TD3": "Triple-Doubles"
+    }
+
+    # make a stats df that has everything we need and drop the previously defined not needed columns
+    data = data.drop(columns=columns_to_drop)
+    # rename columns
+    data = data.rename(columns=rename_dict)
+    # create a total games column
+    data["Total Games"] = data["Wins"] + data["Losses"]
+    # every per game column at once: the totals as one 2d array divided by the games column
+    totals = data[list(PER_GAME.values())].to_numpy(dtype=np.float64)
+    per_game = np.round(totals / data["Total Games"].to_numpy(dtype=np.float64)[:, None], 1)
+    data = pd.concat([data, pd.DataFrame(per_game, index=data.index, columns=list(PER_GAME))], axis=1)
+
+    # make criteria for 3pt % depending on 3pt attempts
+    over_10_3_attempts = data["Three-Pointers Attempted"] > 150
+    data["Three-Pointers %"] = np.where(over_10_3_attempts, data["Three-Pointers %"] * 100, np.nan)
+
+    # make criteria for FG % depending on FG attempts
+    over_10_fg_attempts = data["Field Goals Attempted"] > 150
+    data["Field Goal %"] = np.where(over_10_fg_attempts, data["Field Goal %"] * 100, np.nan)
+
+    # store it with compact types (float32 stats, int16 counts, categorical name)
+    data = apply_schema(data)
+    data = data.set_index("Name")
+    return data
+
+
+# fingerprint of a raw season, tells us if the upstream data changed since the last build
+def digest(data):
+    return hashlib.sha1(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes()).hexdigest()
+
+
+# fetch one season and prepare it, unless the upstream data is the same as in the checkpoint
+# returns True when the season was (re)built
+def build_season(season, endpoint=None):
+    raw = load_data(season, endpoint=endpoint)
+    fingerprint = digest(raw)
+    checkpoint = season_checkpoints.get(season, None)
+    if checkpoint is not None and checkpoint[0] == fingerprint:
+        return False
+    season_checkpoints.set(season, (fingerprint, prepare_dataset(raw)))
+    return True
+
+
+# build the combined dataset: fetch the seasons concurrently behind the upstream rate limit, checkpoint each one,
+# and only refetch seasons without a checkpoint, the live (latest) season and the ones asked for in `refresh`
+# rate overrides the upstream rate limit (requests per second) for this process
+def build_dataset(seasons=SEASONS, refresh=(), force=False, workers=4, rate=None, endpoint=None, output=CSV_PATH, log=print):
+    live_season = seasons[-1]
+    to_fetch = [
+        season for season in seasons
+        if force or season in refresh or season == live_season or season_checkpoints.get(season, None) is None
+    ]
+
+    if rate is not None:
+        upstream.set_rate_limit(rate, burst=workers)
+    changed = []
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(build_season, season, endpoint): season for season in to_fetch}
+        for future in as_completed(futures):
+            season = futures[future]
+            try:
+                if future.result():
+                    changed.append(season)
+                    log(f"{season}: rebuilt")
+                else:
+                    log(f"{season}: unchanged")
+            except Exception as error:
+                failed[season] = error
+                log(f"{season}: failed ({error})")
+
+    if failed:
+        # everything that worked is checkpointed, running again only fetches what is missing
+        raise RuntimeError(f"{len(failed)} season(s) failed, run again to resume: {', '.join(sorted(failed))}")
+
+    # Combine all datasets into a single DataFrame
+    combined_df = pd.concat([season_checkpoints.get(season)[1].assign(Season=season) for season in seasons])
+    # categories of the seasons don't line up, so the concat falls back to plain types, cast it back
+    combined_df = apply_schema(combined_df.reset_index()).set_index("Name")
+
+    if output is None:
+        return combined_df
+    if changed or force or not os.path.exists(output):
+        # Save the combined DataFrame to a CSV file, and the columnar copy the pages read
+        combined_df.to_csv(output, index=True)
+        if output == CSV_PATH:
+            convert()
+        log(f"wrote {output} ({len(combined_df)} rows, {len(changed)} season(s) changed)")
+    else:
+        log("nothing changed")
+    return combined_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build combined_nba_stats.csv from the LeagueDashPlayerStats endpoint.")
+    parser.add_argument("--seasons", nargs="+", default=SEASONS, help="seasons to include, like 2023-24")
+    parser.add_argument("--refresh", nargs="+", default=(), help="seasons to fetch again even if they are checkpointed")
+    parser.add_argument("--force", action="store_true", help="fetch every season again")
+    parser.add_argument("--workers", type=int, default=4, help="seasons fetched at the same time")
+    parser.add_argument("--rate", type=float, default=upstream.RATE, help="upstream requests per second")
+    parser.add_argument("--output", default=CSV_PATH, help="where to write the csv")
+    args = parser.parse_args(argv)
+    build_dataset(args.seasons, args.refresh, args.force, args.workers, args.rate, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
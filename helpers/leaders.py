@@ -0,0 +1,161 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from helpers.aggregates import RATIOS
+from helpers.cache import TieredCache
+from helpers.dataset import ID_COLUMN, NON_STAT_COLUMNS, PER_GAME, widen
+
+# how many leaders are kept for every season and stat
+TOP_N = 10
+
+# the columns the minimum games and minimum attempts qualifiers look at
+GAMES_COLUMN = "Total Games"
+ATTEMPTS_COLUMN = "Field Goals Attempted"
+
+# a leaderboard over any stat, season range and qualifiers, it's also the key of the cached result
+Query = namedtuple("Query", ["stat", "season_from", "season_to", "min_games", "min_attempts", "n", "ascending", "per_player"])
+
+# query results, they are cheap to make again so they only live in memory for a while
+RESULT_TTL = 3600
+leaderboard_cache = TieredCache("leaderboards", max_entries=256)
+
+
+# the attempts a stat's minimum attempts qualifier counts: its own for a percentage, field goals for anything else
+def attempts_column(stat):
+    return RATIOS[stat][1] if stat in RATIOS else ATTEMPTS_COLUMN
+
+
+# row ids of the n best values (largest, or smallest when ascending), best first, missing values never make it in
+def top_rows(rows, values, n, ascending=False):
+    key = values if ascending else -values
+    # missing values go to the end
+    key = np.where(np.isnan(key), np.inf, key)
+    n = min(n, int(np.count_nonzero(~np.isnan(values))))
+    if n == 0:
+        return rows[:0]
+    # partial selection puts the n best in front without sorting the rest, only those n get sorted
+    best = np.argpartition(key, n - 1)[:n] if n < len(key) else np.arange(len(key))
+    best = best[np.argsort(key[best], kind="stable")]
+    return rows[best]
+
+
+# top n row ids for every season and numeric stat, in both directions, built once per dataset
+class LeaderboardIndex:
+    def __init__(self, store, n=TOP_N):
+        self.n = n
+        self.version = store.version
+        self.names = store.column("Name")
+        self._store = store
+        self._top = {}
+
+        # group the rows by season once
+        season_codes, self.seasons = pd.factorize(store.column("Season"))
+        # seasons in time order and every row's place in it, a season range is a range of these
+        self.season_order = np.sort(self.seasons)
+        self._season_rank = np.searchsorted(self.season_order, store.column("Season"))
+        # players by id, two players with the same name stay apart, each is shown with their latest name
+        self._player_codes, player_ids = pd.factorize(store.column(ID_COLUMN))
+        by_season = np.argsort(self._season_rank, kind="stable")
+        self.players = np.empty(len(player_ids), dtype=object)
+        self.players[self._player_codes[by_season]] = self.names[by_season]
+        order = np.argsort(season_codes, kind="stable")
+        bounds = np.searchsorted(season_codes[order], np.arange(len(self.seasons) + 1))
+
+        self.stats = [name for name in store.column_names if name not in NON_STAT_COLUMNS]
+        for stat in self.stats:
+            values = store.column(stat).astype(np.float64)
+            for i, season in enumerate(self.seasons):
+                rows = order[bounds[i]:bounds[i + 1]]
+                season_values = values[rows]
+                self._top[(season, stat, False)] = top_rows(rows, season_values, n)
+                self._top[(season, stat, True)] = top_rows(rows, season_values, n, ascending=True)
+
+    # row ids of the n leaders of a season in a stat
+    def top(self, season, stat, n=5, ascending=False):
+        if n > self.n:
+            raise ValueError(f"the index only keeps the top {self.n}")
+        return self._top[(season, stat, ascending)][:n]
+
+    # the n leaders as a series of the stat indexed by name
+    def leaders(self, season, stat, n=5, ascending=False):
+        rows = self.top(season, stat, n, ascending)
+        return pd.Series(
+            widen(self._store.column(stat)[rows]),
+            index=pd.Index(self.names[rows], name="Name"),
+            name=stat,
+        )
+
+    # a leaderboard of any stat: seasons is one season, a (first, last) range or None for all of them
+    # with per_player every player's seasons in the range are added up into one line, otherwise every season is its own line
+    def query(self, stat, seasons=None, min_games=0, min_attempts=0, n=10, ascending=False, per_player=False):
+        if seasons is None:
+            seasons = (self.season_order[0], self.season_order[-1])
+        elif isinstance(seasons, str):
+            seasons = (seasons, seasons)
+        query = Query(stat, seasons[0], seasons[1], min_games, min_attempts, n, ascending, per_player)
+        return leaderboard_cache.get_or_load(f"{self.version}:{query}", lambda: self.run(query), ttl=RESULT_TTL)
+
+    # a query as a plan: ids of the lines that pass the filters and their values, the selection is left to top_rows
+    def compile(self, query):
+        first = np.searchsorted(self.season_order, query.season_from)
+        last = np.searchsorted(self.season_order, query.season_to)
+        rows = np.flatnonzero((self._season_rank >= first) & (self._season_rank <= last))
+        attempts = attempts_column(query.stat)
+
+        if not query.per_player:
+            games = self._store.column(GAMES_COLUMN)[rows]
+            made_it = (games >= query.min_games) & (self._store.column(attempts)[rows] >= query.min_attempts)
+            rows = rows[made_it]
+            return rows, self._store.column(query.stat)[rows].astype(np.float64)
+
+        # add up the seasons of every player, one bincount per column
+        codes = self._player_codes[rows]
+
+        def total(column):
+            values = np.nan_to_num(self._store.column(column)[rows].astype(np.float64))
+            return np.bincount(codes, weights=values, minlength=len(self.players))
+
+        games = total(GAMES_COLUMN)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if query.stat in RATIOS:
+                made, attempted, scale = RATIOS[query.stat]
+                values = total(made) / total(attempted) * scale
+            elif query.stat in PER_GAME:
+                values = np.round(total(PER_GAME[query.stat]) / games, 1)
+            else:
+                values = total(query.stat)
+        players = np.flatnonzero((games > 0) & (games >= query.min_games) & (total(attempts) >= query.min_attempts))
+        return players, values[players]
+
+    # run a query, the n best lines best first
+    def run(self, query):
+        ids, values = self.compile(query)
+        best = top_rows(ids, values, query.n, query.ascending)
+        if query.per_player:
+            return pd.DataFrame({
+                "Name": self.players[best],
+                "Seasons": f"{query.season_from} - {query.season_to}",
+                query.stat: values[np.searchsorted(ids, best)],
+            })
+        return pd.DataFrame({
+            "Name": self.names[best],
+            "Season": self._store.column("Season")[best],
+            query.stat: widen(self._store.column(query.stat)[best]),
+        })
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# the leaderboard index of a store, built on first use and kept as long as the data doesn't change
+def get_leaderboard_index(store):
+    with _indexes_lock:
+        index = _indexes.get(store.version)
+        if index is None:
+            _indexes.clear()
+            index = _indexes[store.version] = LeaderboardIndex(store)
+        return index
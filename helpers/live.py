@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from datetime import datetime as dt
+
+from helpers.games import LIVE_TTL, SCORE_BOX_COLUMNS, fetch_game_range, game_cache, is_final
+
+logger = logging.getLogger(__name__)
+
+# seconds between two upstream polls, the same no matter how many tabs are watching
+POLL_INTERVAL = 30
+# a day nobody has looked at for this long is not polled anymore, with no days left the poller stops
+IDLE_AFTER = 120
+
+
+# one background poller for the whole server, every session reads the same snapshot instead of asking upstream itself
+# a poll is one ranged request for all the watched days, the tiles redraw from the latest snapshot
+# a tile whose score didn't change renders the same html (render_score_box is cached) and streamlit leaves it as it is
+class LiveScoreboard:
+    def __init__(self, interval=POLL_INTERVAL, idle_after=IDLE_AFTER):
+        self.interval = interval
+        self.idle_after = idle_after
+        # day -> when a session last showed it
+        self._watched = {}
+        # day -> {game_id: score box row}
+        self._games = {}
+        # day -> when its games were last taken in
+        self._updated = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # called on every run of a live day, the first call for a day seeds it with the games the page already loaded
+    def watch(self, day, games):
+        with self._lock:
+            self._watched[day] = time.monotonic()
+            seed = day not in self._games
+        if seed:
+            self.update(day, games, store=False)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-scoreboard", daemon=True)
+                self._thread.start()
+
+    # a session is still showing the day, False once the day isn't polled anymore (it's final or went idle)
+    def keep_alive(self, day):
+        with self._lock:
+            if day not in self._watched:
+                return False
+            self._watched[day] = time.monotonic()
+            return True
+
+    # game ids of the day in upstream order
+    def game_ids(self, day):
+        with self._lock:
+            return list(self._games.get(day, {}))
+
+    # when the games of a day were last taken in, None when the day was dropped
+    def updated_at(self, day):
+        with self._lock:
+            return self._updated.get(day)
+
+    # the latest score box row of a game, None when the day was dropped
+    def game(self, day, game_id):
+        with self._lock:
+            return self._games.get(day, {}).get(game_id)
+
+    # take in a fresh result of a day
+    def update(self, day, games, store=True):
+        rows = {row[0]: row for row in games[SCORE_BOX_COLUMNS].itertuples(index=False, name=None)}
+        final = is_final(day, games)
+        with self._lock:
+            self._games[day] = rows
+            self._updated[day] = dt.now()
+            # a final day never changes again, the next full run shows it from the cache
+            if final:
+                self._watched.pop(day, None)
+        # full runs of the page get the polled result too instead of fetching it again
+        if store:
+            game_cache.set(day.isoformat(), games, ttl=None if final else LIVE_TTL)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                now = time.monotonic()
+                for day, seen in list(self._watched.items()):
+                    if now - seen > self.idle_after:
+                        del self._watched[day]
+                # final and idle days are dropped, a session still showing one reruns in full and watches it again
+                for day in set(self._games) - set(self._watched):
+                    del self._games[day]
+                    self._updated.pop(day, None)
+                days = sorted(self._watched)
+                if not days:
+                    self._thread = None
+                    return
+            try:
+                games = fetch_game_range(days[0], days[-1])
+            except Exception as error:
+                # keep showing the last snapshot, the next poll tries again
+                logger.warning("polling live games failed: %s", error)
+                continue
+            for day in days:
+                self.update(day, games[games["GAME_DATE_x"] == day.isoformat()].reset_index(drop=True))
+
+
+# the one poller of this server process
+live_scoreboard = LiveScoreboard()
@@ -0,0 +1,163 @@
+import datetime as dt
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from helpers.cache import MISSING, TieredCache, memoize
+from helpers.dataset import ROOT
+from helpers.upstream import fetch
+
+# columns of the player table, the ones the guessing game shows and compares
+PLAYER_COLUMNS = ["NAME", "TEAM", "POSITION", "AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY", "IMAGE"]
+
+# the table is rebuilt in the background once it is older than this, in seconds
+REFRESH_AFTER = 24 * 60 * 60
+# after a failed build the next one waits this long, in seconds
+RETRY_BUILD_AFTER = 10 * 60
+
+logger = logging.getLogger(__name__)
+
+# the table of every active player, kept on disk so a restart doesn't have to rebuild it
+player_table_cache = TieredCache("players")
+# players looked up one by one while the table is missing or doesn't have them yet
+player_info_cache = TieredCache("player_info", max_entries=1000)
+
+_build_lock = threading.Lock()
+_building = False
+_failed_at = None
+
+
+# load teams data (division, conference)
+def load_teams_data():
+    return pd.read_csv(os.path.join(ROOT, "teams.csv"))
+
+
+# get all players data, fetched at most once a day (per host with the sqlite cache backend)
+@memoize("all_players", ttl=REFRESH_AFTER)
+def get_all_players():
+    from nba_api.stats.endpoints import commonallplayers
+    return fetch(commonallplayers.CommonAllPlayers, is_only_current_season=1)[0].dropna(how="any")
+
+
+# load in the further stats of one player from stats.nba.com, background calls leave room for the pages' lookups
+def fetch_player_info(id, background=False):
+    from nba_api.stats.endpoints import commonplayerinfo
+    return fetch(commonplayerinfo.CommonPlayerInfo, background=background, player_id=id)[0].dropna(how="any")
+
+
+# turn CommonPlayerInfo rows (any number of players) into the player table, indexed by PERSON_ID
+def prepare_players(player_stats, teams):
+    # url for the images of players
+    url = "https://cdn.nba.com/headshots/nba/latest/1040x760/{}.png"
+    player_stats = player_stats.copy()
+
+    # set the image column with formating the url
+    player_stats["IMAGE"] = player_stats["PERSON_ID"].map(url.format)
+
+    # converting the birth date to datetime
+    player_stats["BIRTHDATE"] = pd.to_datetime(player_stats["BIRTHDATE"], utc=True)
+
+    # making a name column that combines the first and last name
+    player_stats["NAME"] = player_stats["FIRST_NAME"] + " " + player_stats["LAST_NAME"]
+
+    # making a team column that combines the city and team name
+    player_stats["TEAM"] = player_stats["TEAM_CITY"] + " " + player_stats["TEAM_NAME"]
+
+    # adding the team information (division, conference), one merge for every player
+    player_stats = player_stats.merge(teams, left_on="TEAM", right_on="TEAM")
+
+    # calculating the age
+    player_stats["AGE"] = dt.datetime.now().year - player_stats["BIRTHDATE"].dt.year
+
+    # setting the correct types, a jersey that isn't a number becomes unknown instead of failing the whole table
+    player_stats["JERSEY"] = pd.to_numeric(player_stats["JERSEY"], errors="coerce")
+    player_stats = player_stats.astype({"AGE": "Int64", "JERSEY": "Int64"})
+
+    # only looking at active players, with the columns we show and use
+    active_players = player_stats[player_stats["GAMES_PLAYED_FLAG"] == "Y"]
+    active_players = active_players.set_index("PERSON_ID")[PLAYER_COLUMNS]
+
+    # drop all players who have at least one unknown stat
+    active_players = active_players.dropna(how="any")
+    return active_players[~active_players.index.duplicated()]
+
+
+# fetch every active player's info in bulk (concurrently, under the background rate limit) and build the table
+def build_player_table(workers=4):
+    ids = get_all_players()["PERSON_ID"].tolist()
+
+    def fetch_one(id):
+        try:
+            return fetch_player_info(id, background=True)
+        except Exception:
+            # one failed player shouldn't fail the table, they are looked up on their own when guessed
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        infos = [info for info in executor.map(fetch_one, ids) if info is not None]
+    if not infos:
+        raise RuntimeError("no player info could be fetched")
+
+    table = prepare_players(pd.concat(infos, ignore_index=True), load_teams_data())
+    player_table_cache.set("active", (time.time(), table))
+    return table
+
+
+# build the table on a background thread, only one build runs at a time and a failed one isn't retried right away
+def refresh_in_background():
+    global _building
+    with _build_lock:
+        if _building or (_failed_at is not None and time.time() - _failed_at < RETRY_BUILD_AFTER):
+            return
+        _building = True
+
+    def run():
+        global _building, _failed_at
+        failed = False
+        try:
+            build_player_table()
+        except Exception:
+            logger.exception("building the player table failed, retrying in %s s", RETRY_BUILD_AFTER)
+            failed = True
+        finally:
+            with _build_lock:
+                _building = False
+                _failed_at = time.time() if failed else None
+
+    threading.Thread(target=run, name="player-table", daemon=True).start()
+
+
+# the current player table, None while the first build is still running
+def get_player_table():
+    cached = player_table_cache.get("active")
+    if cached is MISSING:
+        refresh_in_background()
+        return None
+    built_at, table = cached
+    if time.time() - built_at > REFRESH_AFTER:
+        # still serve the old table, the new one replaces it when it's ready
+        refresh_in_background()
+    return table
+
+
+# one player's row of the table (empty if he isn't an active player), a dictionary lookup when the table is ready
+def lookup_player(id):
+    id = int(id)
+    table = get_player_table()
+    if table is not None and id in table.index:
+        return table.loc[[id]]
+    # not in the table (yet), fall back to asking for this one player
+    return player_info_cache.get_or_load(
+        str(id),
+        lambda: prepare_players(fetch_player_info(id), load_teams_data()),
+        ttl=REFRESH_AFTER,
+    )
+
+
+# build the table from the command line, meant to be run on a schedule: python -m helpers.players
+if __name__ == "__main__":
+    print(f"{len(build_player_table())} active players")
@@ -0,0 +1,126 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from helpers.dataset import ID_COLUMN, NON_STAT_COLUMNS, ROOT, get_store, source_of, write_table
+
+# every season rank and percentile of the dataset, next to the arrow file it's made from
+RANKS_PATH = os.path.join(ROOT, "combined_nba_stats.ranks.arrow")
+
+# a missing value has no rank (0) and no percentile (255)
+NO_RANK = 0
+NO_PERCENTILE = 255
+
+
+# dense rank (1 is the highest value, ties share a rank) and percentile (share of the season below, 0-100)
+# of every numeric stat within its season, all stats are sorted together in one grouped pass
+def compute_ranks(store):
+    stats = [name for name in store.column_names if name not in NON_STAT_COLUMNS]
+    season_codes, seasons = pd.factorize(store.column("Season"))
+    matrix = np.column_stack([store.column(stat).astype(np.float64) for stat in stats])
+    missing = np.isnan(matrix)
+
+    # one sort key per cell: the season as the whole part, the value (highest first) squeezed into the fraction
+    # and missing values at the end of their season, so sorting the columns groups by season and ranks in one go
+    low, high = np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0)
+    spread = np.where(high > low, high - low, 1)
+    keys = season_codes[:, None] + np.where(missing, 0.75, (high - matrix) / spread * 0.5)
+    order = np.argsort(keys, axis=0, kind="stable")
+
+    values = np.take_along_axis(matrix, order, axis=0)
+    present = ~np.take_along_axis(missing, order, axis=0)
+    sorted_seasons = season_codes[order[:, 0]]
+    starts = np.searchsorted(sorted_seasons, np.arange(len(seasons)))
+    season_start = starts[sorted_seasons][:, None]
+
+    # a new rank starts at every new value and at every new season
+    new_value = np.ones(values.shape, dtype=bool)
+    new_value[1:] = values[1:] != values[:-1]
+    new_value[starts] = True
+    groups = np.cumsum(new_value, axis=0)
+    dense = groups - groups[season_start, np.arange(len(stats))] + 1
+
+    # last place of every tie, everybody after it in the season has a lower value
+    # the columns are laid end to end with their own offsets so one searchsorted finds the ends of all of them
+    column_offsets = np.arange(len(stats)) * len(values)
+    flat = (groups + column_offsets).T.ravel()
+    ends = np.searchsorted(flat, flat, side="right").reshape(len(stats), -1).T - 1 - column_offsets
+    valid = np.add.reduceat(present, starts, axis=0)[sorted_seasons]
+    below = valid - (ends - season_start) - 1
+    percentile = np.round(100 * below / np.maximum(valid - 1, 1))
+
+    ranks = np.full(matrix.shape, NO_RANK, dtype=np.int16)
+    percentiles = np.full(matrix.shape, NO_PERCENTILE, dtype=np.uint8)
+    np.put_along_axis(ranks, order, np.where(present, dense, NO_RANK).astype(np.int16), axis=0)
+    np.put_along_axis(percentiles, order, np.where(present, percentile, NO_PERCENTILE).astype(np.uint8), axis=0)
+    return stats, ranks, percentiles
+
+
+# write the ranks of a store next to it, marked with the version of the data they were made from
+def build_ranks(store, path=RANKS_PATH):
+    stats, ranks, percentiles = compute_ranks(store)
+    columns = {}
+    for j, stat in enumerate(stats):
+        columns[f"{stat} Rank"] = pa.array(ranks[:, j])
+        columns[f"{stat} Percentile"] = pa.array(percentiles[:, j])
+    table = pa.table(columns).replace_schema_metadata({"source": store.version})
+    return write_table(table, path)
+
+
+# ranks and percentiles memory mapped like the dataset, row i belongs to row i of the dataset
+class RankTable:
+    def __init__(self, store, path=RANKS_PATH):
+        self.version = store.version
+        self.table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        self._columns = {}
+        # row of every player's season by player id, so a lookup doesn't scan anything
+        self._rows = {key: row for row, key in enumerate(zip(store.column(ID_COLUMN).tolist(), store.column("Season")))}
+
+    def _column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns[name] = self.table.column(name).to_numpy()
+        return values
+
+    # row of a player's season, None if the player didn't play that season
+    def row(self, player_id, season):
+        return self._rows.get((int(player_id), season))
+
+    # rank and percentile of a row in a stat, None for a missing value
+    def rank(self, row, stat):
+        rank = int(self._column(f"{stat} Rank")[row])
+        percentile = int(self._column(f"{stat} Percentile")[row])
+        return (None if rank == NO_RANK else rank), (None if percentile == NO_PERCENTILE else percentile)
+
+    # rank and percentile of a player's season in a stat, (None, None) if there's none
+    def rank_of(self, player_id, season, stat):
+        row = self.row(player_id, season)
+        return (None, None) if row is None else self.rank(row, stat)
+
+    # ranks or percentiles of some rows in some stats, as a dataframe with a column per stat
+    def frame(self, rows, stats, kind="Rank"):
+        return pd.DataFrame({stat: self._column(f"{stat} {kind}")[rows] for stat in stats})
+
+
+_ranks = None
+_ranks_lock = threading.Lock()
+
+
+# the rank table of a store, the file is made again when it's missing or was made from other data
+def get_ranks(store=None):
+    global _ranks
+    store = store or get_store()
+    with _ranks_lock:
+        if _ranks is None or _ranks.version != store.version:
+            if not os.path.exists(RANKS_PATH) or source_of(RANKS_PATH) != store.version:
+                build_ranks(store)
+            _ranks = RankTable(store)
+        return _ranks
+
+
+# precompute from the command line: python -m helpers.ranks
+if __name__ == "__main__":
+    print(build_ranks(get_store()))
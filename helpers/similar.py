@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from helpers.dataset import ID_COLUMN, PER_GAME, widen
+from helpers.leaders import top_rows
+
+# the stats a season is compared on, every per game column
+FEATURES = list(PER_GAME)
+
+# query rows compared against every season at once, bounds the distance block to BLOCK x rows floats
+BLOCK = 256
+
+
+# every season as a standardized per game vector, built once per dataset
+# distances are |a|^2 + |b|^2 - 2 a.b, so a whole block of queries is one matrix product against the prebuilt matrix
+class SimilarityIndex:
+    def __init__(self, store):
+        self.version = store.version
+        self._store = store
+        self.names = store.column("Name")
+        self.seasons = store.column("Season")
+        # players by id, names aren't unique
+        ids = store.column(ID_COLUMN)
+        self._rows = {key: row for row, key in enumerate(zip(ids.tolist(), self.seasons))}
+        self._player_codes = pd.factorize(ids)[0]
+
+        # seasons in time order and every row's place in it, an era is a range of these
+        self.season_order = np.sort(pd.unique(self.seasons))
+        self._season_rank = np.searchsorted(self.season_order, self.seasons)
+
+        # the stats as they are, for showing the matches
+        self._values = np.column_stack([store.column(stat) for stat in FEATURES])
+        # z-scores, so points (tens) don't drown out blocks (ones)
+        matrix = np.nan_to_num(self._values.astype(np.float64))
+        spread = matrix.std(axis=0)
+        self.matrix = np.ascontiguousarray((matrix - matrix.mean(axis=0)) / np.where(spread > 0, spread, 1), dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    # row of a player's season, None if the player didn't play that season
+    def row(self, player_id, season):
+        return self._rows.get((int(player_id), season))
+
+    # squared distances of some rows to every row, one matrix product per block of queries
+    def distances(self, rows):
+        rows = np.asarray(rows)
+        result = np.empty((len(rows), len(self.matrix)), dtype=np.float32)
+        for start in range(0, len(rows), BLOCK):
+            block = rows[start:start + BLOCK]
+            products = self.matrix[block] @ self.matrix.T
+            result[start:start + BLOCK] = self.norms[block, None] + self.norms[None, :] - 2 * products
+        # rounding can leave tiny negatives for (nearly) equal vectors
+        return np.maximum(result, 0, out=result)
+
+    # seasons a query can be matched with: inside the era (a (first, last) range of seasons) and, with other_players,
+    # not one of the player's own seasons, the query row itself never is
+    def _candidates(self, row, seasons=None, other_players=True):
+        candidates = np.ones(len(self.matrix), dtype=bool)
+        if seasons is not None:
+            first, last = np.searchsorted(self.season_order, seasons[0]), np.searchsorted(self.season_order, seasons[1])
+            candidates &= (self._season_rank >= first) & (self._season_rank <= last)
+        if other_players:
+            candidates &= self._player_codes != self._player_codes[row]
+        candidates[row] = False
+        return candidates
+
+    # the k closest candidates of a query row given its distances, closest first
+    def _select(self, row, distances, k, seasons, other_players):
+        # left out seasons are NaN, the selection never picks those
+        distances = np.where(self._candidates(row, seasons, other_players), distances, np.nan)
+        return top_rows(np.arange(len(self.matrix)), distances, k, ascending=True)
+
+    # rows of the k closest seasons to each query row, closest first
+    def nearest(self, rows, k=10, seasons=None, other_players=True):
+        return [
+            self._select(row, distances, k, seasons, other_players)
+            for row, distances in zip(rows, self.distances(rows))
+        ]
+
+    # the k seasons most like a player's season, as a table with the distance and the compared stats
+    def similar(self, player_id, season, k=10, seasons=None, other_players=True):
+        row = self.row(player_id, season)
+        distances = self.distances([row])[0]
+        best = self._select(row, distances, k, seasons, other_players)
+        stats = widen(self._values[best])
+        table = pd.DataFrame(stats, columns=FEATURES)
+        table.insert(0, "Name", self.names[best])
+        table.insert(1, "Season", self.seasons[best])
+        table.insert(2, "Distance", np.round(np.sqrt(distances[best]), 2))
+        return table
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# the similarity index of a store, built on first use and kept as long as the data doesn't change
+def get_similarity_index(store):
+    with _indexes_lock:
+        index = _indexes.get(store.version)
+        if index is None:
+            _indexes.clear()
+            index = _indexes[store.version] = SimilarityIndex(store)
+        return index
@@ -0,0 +1,171 @@
+import contextlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from helpers.cache import CACHE_DIR, MISSING
+
+# one database for every cache of the host, each worker process opens it on its own
+DB_PATH = os.path.join(CACHE_DIR, "shared.sqlite")
+
+# a process that took the lease of a key and died is ignored after this many seconds
+LEASE_TTL = 120
+# how often a process waiting for another one's load looks for the result, in seconds
+LEASE_POLL = 0.05
+# expired entries are deleted after this many writes of a process
+PURGE_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache TEXT NOT NULL, key TEXT NOT NULL, expires REAL, kind TEXT NOT NULL, value BLOB NOT NULL,
+    PRIMARY KEY (cache, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leases (
+    cache TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, expires REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+) WITHOUT ROWID;
+"""
+
+_local = threading.local()
+
+
+# the connection of this thread, sqlite connections can't be shared between threads
+def connection(path=DB_PATH):
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    db = connections.get(path)
+    if db is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # autocommit, the few multi statement changes open their own transaction
+        db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        # readers don't block the writer and the other way round
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        connections[path] = db
+    return db
+
+
+# a dataframe as a zstd compressed arrow stream
+def frame_to_bytes(frame):
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def frame_from_bytes(data):
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+# a value as (kind, bytes): dataframes and tuples of them go through arrow, anything else is pickled
+def serialize(value):
+    try:
+        if isinstance(value, pd.DataFrame):
+            return "frame", frame_to_bytes(value)
+        if isinstance(value, tuple) and value and all(isinstance(item, pd.DataFrame) for item in value):
+            return "frames", pickle.dumps([frame_to_bytes(item) for item in value])
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # columns arrow can't type (mixed objects), pickle still can
+        pass
+    return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(kind, data):
+    if kind == "frame":
+        return frame_from_bytes(data)
+    if kind == "frames":
+        return tuple(frame_from_bytes(item) for item in pickle.loads(data))
+    return pickle.loads(data)
+
+
+# the second level of a TieredCache in one sqlite database shared by every process of the host
+# entries keep their expiry, and a lease per key lets only one process load a missing entry while the rest wait
+class SqliteBackend:
+    def __init__(self, name, path=DB_PATH):
+        self.name = name
+        self.path = path
+        self._writes = 0
+
+    def __contains__(self, key):
+        row = connection(self.path).execute(
+            "SELECT 1 FROM entries WHERE cache = ? AND key = ? AND (expires IS NULL OR expires > ?)",
+            (self.name, str(key), time.time()),
+        ).fetchone()
+        return row is not None
+
+    # (seconds left or None for good, value), or MISSING
+    def get(self, key):
+        row = connection(self.path).execute(
+            "SELECT expires, kind, value FROM entries WHERE cache = ? AND key = ?", (self.name, str(key))
+        ).fetchone()
+        if row is None:
+            return MISSING
+        expires, kind, data = row
+        left = None if expires is None else expires - time.time()
+        if left is not None and left <= 0:
+            return MISSING
+        try:
+            return left, deserialize(kind, data)
+        except Exception:
+            # written by an incompatible version, treat it as missing and let it be loaded again
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        kind, data = serialize(value)
+        expires = None if ttl is None else time.time() + ttl
+        db = connection(self.path)
+        db.execute(
+            "INSERT OR REPLACE INTO entries (cache, key, expires, kind, value) VALUES (?, ?, ?, ?, ?)",
+            (self.name, str(key), expires, kind, data),
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            db.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    # take the lease of a key if nobody (alive) holds it
+    def _acquire(self, key, owner):
+        db = connection(self.path)
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM leases WHERE cache = ? AND key = ? AND expires <= ?", (self.name, key, now))
+            db.execute(
+                "INSERT OR IGNORE INTO leases (cache, key, owner, expires) VALUES (?, ?, ?, ?)",
+                (self.name, key, owner, now + LEASE_TTL),
+            )
+            holder = db.execute("SELECT owner FROM leases WHERE cache = ? AND key = ?", (self.name, key)).fetchone()
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return holder is not None and holder[0] == owner
+
+    def _release(self, key, owner):
+        connection(self.path).execute(
+            "DELETE FROM leases WHERE cache = ? AND key = ? AND owner = ?", (self.name, key, owner)
+        )
+
+    # hold the lease of a key while loading it, or wait until the process holding it has stored the value
+    # if the holder takes longer than LEASE_TTL the waiter stops waiting and loads it too
+    @contextlib.contextmanager
+    def lease(self, key):
+        key = str(key)
+        owner = f"{os.getpid()}-{threading.get_ident()}"
+        deadline = time.monotonic() + LEASE_TTL
+        acquired = self._acquire(key, owner)
+        while not acquired and key not in self and time.monotonic() < deadline:
+            time.sleep(LEASE_POLL)
+            acquired = self._acquire(key, owner)
+        try:
+            yield
+        finally:
+            if acquired:
+                self._release(key, owner)
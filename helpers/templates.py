@@ -0,0 +1,298 @@
+from functools import lru_cache
+from string import Template
+
+import streamlit as st
+
+# every style of the scoreboard and box score widgets, sent once per page instead of once per widget
+# the result box has its own class names, so the home page score boxes and it can share one stylesheet
+# both boards of the box score page (best performances and starting 5) use the same .board rule
+STYLESHEET = """
+<style>
+    .scoreboard {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        background-color: #c2ddff;
+        padding: 20px;
+        border-radius: 20px;
+        width: fit-content;
+        margin-top: 30px;
+    }
+    .team {
+        display: flex;
+        align-items: center;
+        margin-bottom: 5px;
+    }
+    .team img {
+        width: 60px;
+        height: 60px;
+        margin-right: 15px;
+    }
+    .team-name {
+        font-size: 25px;
+        color: black;
+        font-weight: bold;
+    }
+    .score {
+        font-size: 25px;
+        font-weight: bold;
+        color: black;
+        margin-left: 50px;
+    }
+    .box-score {
+        font-size: 15px;
+        font-weight: bold;
+        color: black;
+        margin-top: 0px;
+        margin-bottom: 0px;
+    }
+    .game-recap {
+        font-size: 15px;
+        font-weight: bold;
+        color: black;
+        margin-top: 0px;
+        margin-bottom: 0px;
+    }
+    .result-board {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: center;
+        background-color: #c2ddff;
+        padding: 20px;
+        border-radius: 20px;
+        width: fit-content;
+        margin: 30px auto;
+    }
+    .result-team {
+        display: flex;
+        align-items: center;
+        margin-bottom: 5px;
+    }
+    .result-team img {
+        width: 100px;
+        height: 100px;
+        margin-right: 15px;
+        margin-left: 15px;
+    }
+    .result-team-name {
+        font-size: 25px;
+        color: black;
+        font-weight: bold;
+        margin-right: 15px;
+    }
+    .result-score {
+        font-size: 35px;
+        font-weight: bold;
+        color: black;
+        margin-left: 50px;
+        margin-right: 50px;
+    }
+    .board {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: center;
+        background-color: #c2ddff;
+        padding: 0px;
+        border-radius: 20px;
+        width: 1000px;
+        margin: auto auto;
+        margin-bottom: 30px;
+    }
+    .title {
+        font-size: 40px;
+        color: black;
+        font-weight: bold;
+        margin-bottom: 0px;
+        margin-top: 0px;
+    }
+    .player-container {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+    }
+    .player {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        margin-bottom: 0px;
+        text-align: center;
+    }
+    .player img {
+        width: auto;
+        height: 200px;
+        margin-right: 10px;
+        margin-left: 10px;
+    }
+    .player-name {
+        font-size: 22px;
+        color: black;
+        font-weight: bold;
+        margin-bottom: 10px;
+    }
+    .stats-name {
+        font-size: 32px;
+        font-weight: bold;
+        color: black;
+        line-height: 70px;
+        margin-left: 20px;
+        margin-right: 20px;
+        justify-content: center;
+    }
+    .stats {
+        text-align: center;
+        font-size: 35px;
+        line-height: 70px;
+        font-weight: bold;
+        color: black;
+        margin-left: 50px;
+        margin-right: 50px;
+    }
+    .players-container {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+    }
+    .players {
+        display: flex;
+        flex-direction: row;
+        align-items: center;
+        margin-bottom: 0px;
+        text-align: center;
+    }
+    .players img {
+        width: auto;
+        height: 100px;
+        margin-right: -30px;
+        margin-left: -30px;
+    }
+    .players-name {
+        font-size: 22px;
+        color: black;
+        font-weight: bold;
+        margin-bottom: 10px;
+    }
+    .tab-space {
+        display: inline-block;
+        width: 150px; /* Adjust width for tab spacing */
+    }
+</style>
+"""
+
+# the html of the widgets, compiled once when the module is imported
+SCORE_BOX = Template("""
+<div class="scoreboard">
+    <div class="team">
+        <img src="$team_1_logo" alt="Team 1">
+        <span class="team-name">$team_1_abbr</span>
+        <span class="score">$team_1_pts</span>
+    </div>
+    <div class="team">
+        <img src="$team_2_logo" alt="Team 2">
+        <span class="team-name">$team_2_abbr</span>
+        <span class="score">$team_2_pts</span>
+    </div>
+    <span class="box-score"><a href="?page=$game_id" target="_self" style="color: black; text-decoration: none;">Boxscore</a></span>
+    <span class="game-recap"><a href="$game_recap" target="_blank" style="color: black; text-decoration: none;">Game Recap</a></span>
+</div>
+""")
+
+RESULT_BOX = Template("""
+<div class="result-board">
+    <div class="result-team">
+        <img src="$team1_logo" alt="Team 1">
+        <span class="result-team-name">$team1_name</span>
+        <span class="result-score">$team1_score</span>
+        <span class="result-score">$team2_score</span>
+        <span class="result-team-name">$team2_name</span>
+        <img src="$team2_logo" alt="Team 2">
+    </div>
+</div>
+""")
+
+BEST_PLAYERS = Template("""
+<div class="board">
+    <div class="title">
+        <span>Best Perfomances</span>
+    </div>
+    <div class="player-container">
+        <div class="player">
+            <div class="player-name">$team1_name</div>
+            <img src="$team1_image" alt="Player 1">
+        </div>
+        <div class="stats">
+            <span>$team1_pts<br>$team1_ast<br>$team1_reb</span>
+        </div>
+        <div class="stats-name">PTS<br>AST<br>REB</div>
+        <div class="stats">
+            <span>$team2_pts<br>$team2_ast<br>$team2_reb</span>
+        </div>
+        <div class="player">
+            <div class="player-name">$team2_name</div>
+            <img src="$team2_image" alt="Player 2">
+        </div>
+    </div>
+</div>
+""")
+
+STARTING5_BOX = Template("""
+<div class="board">
+    <div class="title">
+        <span>Starting 5</span>
+    </div>
+    <div class="players-container">
+        <div class="players">
+            $team1_images
+            <span class="tab-space"></span>
+        </div>
+        <div class="players">
+            $team2_images
+        </div>
+    </div>
+</div>
+""")
+
+PLAYER_IMAGE = Template('<img src="$image" alt="Player $number">')
+
+
+# put the stylesheet on the page, once per script run
+def inject_stylesheet():
+    st.markdown(STYLESHEET, unsafe_allow_html=True)
+
+
+# the rendered widgets are memoized by everything that goes into them, so a game is only rendered again when its score changes
+@lru_cache(maxsize=512)
+def render_score_box(game_id, team_1_logo, team_1_abbr, team_1_pts, team_2_logo, team_2_abbr, team_2_pts, game_recap):
+    return SCORE_BOX.substitute(
+        game_id=game_id, team_1_logo=team_1_logo, team_1_abbr=team_1_abbr, team_1_pts=team_1_pts,
+        team_2_logo=team_2_logo, team_2_abbr=team_2_abbr, team_2_pts=team_2_pts, game_recap=game_recap,
+    )
+
+
+@lru_cache(maxsize=128)
+def render_result_box(team1_name, team2_name, team1_logo, team2_logo, team1_score, team2_score):
+    return RESULT_BOX.substitute(
+        team1_name=team1_name, team2_name=team2_name, team1_logo=team1_logo, team2_logo=team2_logo,
+        team1_score=team1_score, team2_score=team2_score,
+    )
+
+
+# a player is (name, image, pts, ast, reb)
+@lru_cache(maxsize=128)
+def render_best_players(team1_player, team2_player):
+    return BEST_PLAYERS.substitute(
+        team1_name=team1_player[0], team1_image=team1_player[1], team1_pts=team1_player[2],
+        team1_ast=team1_player[3], team1_reb=team1_player[4],
+        team2_name=team2_player[0], team2_image=team2_player[1], team2_pts=team2_player[2],
+        team2_ast=team2_player[3], team2_reb=team2_player[4],
+    )
+
+
+# the starters are tuples of image urls
+@lru_cache(maxsize=128)
+def render_starting5_box(team1_images, team2_images):
+    return STARTING5_BOX.substitute(
+        team1_images="".join(PLAYER_IMAGE.substitute(image=image, number=i + 1) for i, image in enumerate(team1_images)),
+        team2_images="".join(PLAYER_IMAGE.substitute(image=image, number=i + 1) for i, image in enumerate(team2_images)),
+    )
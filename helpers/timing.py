@@ -0,0 +1,34 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+# records how long each part of a script run takes (imports, data loads), to see where cold start time goes
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections = []
+
+    # time one block, kind is "import" or "data"
+    @contextmanager
+    def section(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({"kind": kind, "name": name, "ms": (time.perf_counter() - start) * 1000})
+
+    # every timed section plus the whole run so far, as rows for a table
+    def report(self):
+        total = (time.perf_counter() - self.started) * 1000
+        timed = sum(section["ms"] for section in self.sections)
+        rows = list(self.sections)
+        rows.append({"kind": "other", "name": "rendering and everything else", "ms": total - timed})
+        rows.append({"kind": "total", "name": "script run", "ms": total})
+        return rows
+
+    def log(self):
+        for row in self.report():
+            logger.info("%-6s %-40s %8.1f ms", row["kind"], row["name"], row["ms"])
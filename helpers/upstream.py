@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# requests per second to stats.nba.com from the whole process, and how many can go out back to back
+RATE = 2.0
+BURST = 4
+# requests per second bulk jobs (like the player table build) may use out of RATE, the rest is left for the pages
+BACKGROUND_RATE = 1.0
+# seconds before a request is given up on
+TIMEOUT = 30
+# tries of a request, with 1s, 2s, 4s... between them
+RETRIES = 3
+# keep-alive connections kept open to stats.nba.com
+POOL_SIZE = 10
+# where the requests go, set it to use a local stand-in like benchmarks/replay.py ("http://host:port/stats/{endpoint}")
+BASE_URL = os.environ.get("NBA_STATS_BASE_URL")
+
+
+# lets through `rate` calls per second on average, with bursts of up to `capacity` calls, shared by every thread
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # block until a call is allowed
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# the rate limit every upstream call goes through
+bucket = TokenBucket(RATE, BURST)
+# the extra limit of background calls, they wait for this one before taking a token of the shared bucket
+background_bucket = TokenBucket(BACKGROUND_RATE)
+
+_session_lock = threading.Lock()
+_session_ready = False
+
+# requests that are on their way right now, by endpoint and parameters
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def set_rate_limit(rate, burst=BURST):
+    global bucket
+    bucket = TokenBucket(rate, burst)
+
+
+# give nba_api one pooled keep-alive session, every endpoint shares it instead of opening its own connections
+def ensure_session():
+    global _session_ready
+    with _session_lock:
+        if _session_ready:
+            return
+        import requests
+        from requests.adapters import HTTPAdapter
+        from nba_api.stats.library.http import NBAStatsHTTP
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        NBAStatsHTTP.set_session(session)
+        if BASE_URL:
+            NBAStatsHTTP.base_url = BASE_URL
+        _session_ready = True
+
+
+# one upstream call: wait for the rate limit, retry with backoff when it fails
+def call(endpoint, params, background=False):
+    ensure_session()
+    for attempt in range(RETRIES):
+        if background:
+            background_bucket.acquire()
+        bucket.acquire()
+        try:
+            return endpoint(**params, timeout=TIMEOUT).get_data_frames()
+        except Exception as error:
+            # timeouts, dropped connections and throttled (non json) answers all end up here
+            if attempt == RETRIES - 1:
+                raise
+            logger.warning("%s %s failed (%s), retrying", endpoint.__name__, params, error)
+            time.sleep(2 ** attempt)
+
+
+# the data frames of an nba_api endpoint, every page goes through this
+# when the same request is already on its way (another session asked for the same game at the same moment),
+# we wait for that one instead of sending it again, so they all share one upstream request
+# the frames are shared between the callers, so they must not be changed in place
+# background calls are limited to BACKGROUND_RATE so they never use up the whole rate limit
+def fetch(endpoint, background=False, **params):
+    key = (endpoint.__name__, tuple(sorted((name, str(value)) for name, value in params.items())))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        frames = call(endpoint, params, background=background)
+        future.set_result(frames)
+        return frames
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow as pa
+
+from helpers.dataset import ROOT, SEASONS, write_table
+from helpers import upstream
+
+# box scores of finished games, one folder per season with the games in arrow parts and an index of where each game is
+WAREHOUSE_DIR = os.environ.get("NBA_APP_WAREHOUSE_DIR", os.path.join(ROOT, "boxscores"))
+
+# games written to one part, a failed backfill only loses the part it was working on
+PART_SIZE = 200
+
+
+# season of a game id, the 4th and 5th digits are the year the season starts in: 0022400101 is 2024-25
+def season_of(game_id):
+    year = int(str(game_id)[3:5])
+    year += 1900 if year >= 46 else 2000
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+# the stored box scores of every season, parts are memory mapped and a game is two slices of them
+# the index of a season is read again when a backfill changed it, so a running app sees the nightly appends
+class BoxScoreWarehouse:
+    def __init__(self, directory=WAREHOUSE_DIR):
+        self.directory = directory
+        # season -> (modification time of the index, {game_id: [part, player start, player stop, team start, team stop]})
+        self._indexes = {}
+        self._parts = {}
+        self._lock = threading.Lock()
+
+    def _index_path(self, season):
+        return os.path.join(self.directory, season, "index.json")
+
+    # game index of a season, empty when nothing was stored yet
+    def index(self, season):
+        path = self._index_path(season)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            cached = self._indexes.get(season)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        with open(path) as f:
+            index = json.load(f)
+        with self._lock:
+            self._indexes[season] = (mtime, index)
+        return index
+
+    def __contains__(self, game_id):
+        return str(game_id) in self.index(season_of(game_id))
+
+    # a memory mapped part, opened once
+    def _part(self, season, name):
+        path = os.path.join(self.directory, season, name)
+        with self._lock:
+            table = self._parts.get(path)
+            if table is None:
+                table = self._parts[path] = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            return table
+
+    # player and team stats of a stored game like fetch_box_score gives them, None if it isn't stored
+    def get(self, game_id):
+        season = season_of(game_id)
+        entry = self.index(season).get(str(game_id))
+        if entry is None:
+            return None
+        part, player_start, player_stop, team_start, team_stop = entry
+        players = self._part(season, f"{part}.players.arrow").slice(player_start, player_stop - player_start)
+        teams = self._part(season, f"{part}.teams.arrow").slice(team_start, team_stop - team_start)
+        return players.to_pandas(), teams.to_pandas()
+
+    # write the box scores ({game_id: (players, teams)}) of a season as a new part and add them to the index
+    def append(self, season, box_scores):
+        if not box_scores:
+            return None
+        directory = os.path.join(self.directory, season)
+        os.makedirs(directory, exist_ok=True)
+        index = dict(self.index(season))
+        part = f"part-{len({entry[0] for entry in index.values()}):05d}"
+
+        entries = {}
+        player_frames, team_frames = [], []
+        player_row = team_row = 0
+        for game_id, (players, teams) in box_scores.items():
+            entries[str(game_id)] = [part, player_row, player_row + len(players), team_row, team_row + len(teams)]
+            player_row += len(players)
+            team_row += len(teams)
+            player_frames.append(players)
+            team_frames.append(teams)
+
+        # parts first, the index last, so a reader never finds a game whose part isn't there yet
+        for kind, frames in (("players", player_frames), ("teams", team_frames)):
+            table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+            write_table(table, os.path.join(directory, f"{part}.{kind}.arrow"))
+        index.update(entries)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self._index_path(season))
+        return part
+
+
+# the warehouse the app reads from
+warehouse = BoxScoreWarehouse()
+
+
+# game ids of every finished game of a season, from one LeagueGameFinder request
+def season_game_ids(season):
+    from nba_api.stats.endpoints import leaguegamefinder
+
+    games = pd.DataFrame(upstream.fetch(leaguegamefinder.LeagueGameFinder, season_nullable=season, league_id_nullable="00")[0])
+    finished = games.groupby("GAME_ID")["WL"].apply(lambda results: results.notna().all())
+    return sorted(finished.index[finished])
+
+
+# download every finished game of a season that isn't stored yet, run it again (nightly) to append the new ones
+def backfill(season, workers=4, store=warehouse, log=print):
+    # the box score loader reads from the warehouse, so it's imported here and not at the top
+    from helpers.boxscore import fetch_box_score, is_final
+
+    missing = [game_id for game_id in season_game_ids(season) if game_id not in store]
+    log(f"{season}: {len(missing)} game(s) to download")
+
+    stored = 0
+    failed = []
+    for start in range(0, len(missing), PART_SIZE):
+        batch = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_box_score, game_id): game_id for game_id in missing[start:start + PART_SIZE]}
+            for future in as_completed(futures):
+                game_id = futures[future]
+                try:
+                    players, teams = future.result()
+                except Exception as error:
+                    failed.append(game_id)
+                    log(f"{game_id}: failed ({error})")
+                    continue
+                # a game the stats aren't final for yet is picked up by the next run
+                if is_final(teams):
+                    batch[game_id] = (players, teams)
+        # keep the games in game id order inside a part
+        store.append(season, dict(sorted(batch.items())))
+        stored += len(batch)
+        log(f"{season}: {stored} / {len(missing)} stored")
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} game(s) failed, run again to resume")
+    return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the box scores of finished games into the local warehouse.")
+    parser.add_argument("--seasons", nargs="+", default=SEASONS[-1:], help="seasons to backfill, like 2023-24")
+    parser.add_argument("--workers", type=int, default=4, help="box scores fetched at the same time")
+    parser.add_argument("--rate", type=float, default=upstream.RATE, help="upstream requests per second")
+    args = parser.parse_args(argv)
+    upstream.set_rate_limit(args.rate, burst=args.workers)
+    for season in args.seasons:
+        backfill(season, args.workers)
+
+
+if __name__ == "__main__":
+    main()
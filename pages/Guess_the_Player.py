@@ -1,9 +1,7 @@
 # import the required libraries
-from nba_api.stats.endpoints import commonplayerinfo
-from nba_api.stats.endpoints import commonallplayers
-import datetime as dt
-import pandas as pd
 import streamlit as st
+from helpers.players import get_all_players, get_player_table, lookup_player
+from helpers.guessing import COMPARED_COLUMNS, DIFFICULTIES, GuessHistory, get_candidate_index
 
 # set site logo
 
@@ -33,17 +31,9 @@ with col9:
 
 
 
-# load teams data (division, conference)
-@st.cache_data
-def load_teams_data():
-    teams = pd.read_csv("teams.csv")
-    return teams
-
-
-# get all players data
-@st.cache_data
+# get all players data, cached by helpers.players so a rerun doesn't fetch it again
 def get_player_stats():
-    players_all = commonallplayers.CommonAllPlayers(is_only_current_season=1).get_data_frames()[0].dropna(how="any")
+    players_all = get_all_players()
     return players_all
 
 # choose a random player the user will have to guess
@@ -52,67 +42,47 @@ def get_random_player_stats():
     return player
 
 
-# load in the matching further stats for the player with matching its id
-@st.cache_data
-def load_player_stats(id):
-    player_info = commonplayerinfo.CommonPlayerInfo(player_id=id).get_data_frames()[0].dropna(how="any")
-    return player_info
-
 # load in all players
 players_all = get_player_stats()
-# load in all teams
-teams = load_teams_data()
-
-# adjust the dataframe (add, remove columns, change types)
-@st.cache_data
-def adjust_df(id):
-    # load in one players stats provided by the id
-    player_stats = load_player_stats(id).reset_index(drop=True)
-
-    # url for the images of players
-    url = "https://cdn.nba.com/headshots/nba/latest/1040x760/{}.png"
-
-    # set the image column with formating the url
-    player_stats["IMAGE"] = player_stats["PERSON_ID"].apply(lambda pid: url.format(pid))
-
-    # converting the birth date to datetime
-    player_stats["BIRTHDATE"] = pd.to_datetime(player_stats["BIRTHDATE"], utc = True)
 
-    # making a name column that combines the first and last name
-    player_stats["NAME"] = player_stats["FIRST_NAME"] + " " + player_stats["LAST_NAME"]
+# every active player as bitsets for the hints, None while the player table is still being built
+candidate_index = get_candidate_index(get_player_table())
 
-    # making a team column that combines the city and team name
-    player_stats["TEAM"] = player_stats["TEAM_CITY"] + " " + player_stats["TEAM_NAME"]
-
-    # adding the team information (division, conference)
-    player_stats = player_stats.merge(teams, left_on="TEAM", right_on="TEAM")
+# the stats we show for a player (name, team, position, age, ...), looked up by id in the prebuilt table of active players
+def adjust_df(id):
+    return lookup_player(id)
 
-    # calculating the age
-    player_stats["AGE"] = dt.datetime.now().year - player_stats["BIRTHDATE"].dt.year
 
-    # setting the correct types
-    player_stats = player_stats.astype({"AGE": "Int64","JERSEY": "Int64"})
+# how many guesses a game has
+MAX_GUESSES = 11
 
-    # only looking at active players
-    active_players = player_stats[player_stats["GAMES_PLAYED_FLAG"] == "Y"]
 
-    # setting which columns to show and use
-    active_players = active_players[["NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY", "IMAGE"]]
+# choose a new solution player, skipping players we don't have stats for
+# with a difficulty it's picked by how many players share its answers to the solver's first guess
+def new_solution_id(difficulty="Any"):
+    if candidate_index is not None and difficulty != "Any":
+        return candidate_index.pick_solution(difficulty)
+    for _ in range(20):
+        id = get_random_player_stats()["PERSON_ID"].values[0]
+        if len(adjust_df(id)):
+            break
+    return id
 
-    # drop all players who have at least one unknown stat
-    active_players = active_players.dropna(how="any")
-    return active_players
 
+# how hard the player to guess should be
+difficulty = st.selectbox("Difficulty", ["Any"] + DIFFICULTIES)
 
-# locking the random player in session state
-if 'random_player_id' not in st.session_state:
-    st.session_state.random_player_id = get_random_player_stats()["PERSON_ID"].values[0]
+# locking the random player in session state, picking another difficulty starts a new game
+if 'random_player_id' not in st.session_state or st.session_state.get("difficulty") != difficulty:
+    st.session_state.difficulty = difficulty
+    st.session_state.random_player_id = new_solution_id(difficulty)
+    st.session_state.already_guessed = GuessHistory()
 
 # defining the soolution player
 solution_player = adjust_df(st.session_state.random_player_id)
 
 
-# guessing a player with a selectbox and returning the stats of the player
+# guessing a player with a selectbox and returning the id and stats of the player
 def guess_a_player():
     # guess a player by selecting/typing his name
     guessed_player = st.selectbox(
@@ -120,104 +90,64 @@ def guess_a_player():
     )
 
     # getting the id of the guessed player, so later we can pass it in to get the correct dataframe for him
-    guessed_player_id = players_all[players_all["DISPLAY_FIRST_LAST"] == guessed_player]["PERSON_ID"]
+    guessed_player_id = players_all[players_all["DISPLAY_FIRST_LAST"] == guessed_player]["PERSON_ID"].values[0]
 
     # getting the dataframe by using the id
     guessed_player_stats = adjust_df(guessed_player_id)
-    return guessed_player_stats
+    return guessed_player_id, guessed_player_stats
 
-# making a list of the already guessed players, so they dont disappear when the user guesses again
+# the already guessed players and their verdicts, so they dont disappear when the user guesses again
 if 'already_guessed' not in st.session_state:
-    st.session_state.already_guessed = []
+    st.session_state.already_guessed = GuessHistory()
+history = st.session_state.already_guessed
 
 # defining the guessed player
-guessed_player = guess_a_player()
-
-# styling the guessed players dataframe
-styled_guessed_player = guessed_player.style.apply(
-    lambda x: [
-        # setting the backgroung green if the guessed column is correct
-        'background-color: #2E8B57' if col in ["NAME", "TEAM", "POSITION", "COUNTRY", "COLLEGE", "CONFERENCE", "DIVISION"] and x[col] == solution_player[col].values[0] else
-        # setting the background yellow if the guess is lower than the solution
-        'background-color: #a08a06' if col in ["AGE", "JERSEY"] and x[col] < solution_player[col].values[0] else
-        # setting the background red if the guess is higher than the solution
-        'background-color: #B22222' if col in ["AGE", "JERSEY"] and x[col] > solution_player[col].values[0] else
-        # setting the background green if the guessed column is correct (handling independently because how python handles numbers)
-        'background-color: #2E8B57' if col in ["AGE", "JERSEY"] and abs(x[col] - solution_player[col].values[0]) < 0.01 else
-        ''
-        for col in guessed_player.columns
-    ], axis=1
-).format(precision=1)
-
-# always inserting the last guessed player on the first place of the list
-st.session_state.already_guessed.insert(0, styled_guessed_player)
-
-# setting up a guess counter
-guess_count = 0
-
-length = len(st.session_state.already_guessed)
-placeholder = st.empty()
+guessed_player_id, guessed_player = guess_a_player()
+
+# only a newly picked player is compared, the earlier guesses keep their verdicts
+if guessed_player_id != history.last_id and len(guessed_player) and len(history) < MAX_GUESSES and not history.solved:
+    history.add(guessed_player_id, guessed_player, solution_player)
 
-# gameplay
-with placeholder.container():
-    # looping through the guesses
-    for i, guessed in enumerate(st.session_state.already_guessed):
-        # increase guess count
-        guess_count += 1
-        # displaying the amount of guesses left
-        st.write(f"{10- (length - guess_count)} guesse(s) left")
-        # if still have guesses left
-        if i < 10:
-            # show guessed player
-            st.dataframe(guessed, use_container_width=True, hide_index=True, column_order = ("NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"))
-            # if user guessed it
-            if solution_player["NAME"].values == guessed_player["NAME"].values:
-                # using containers so we can clear the screen
-                with placeholder.container():
-                    st.write("YOU GOT IT")
-                    # display the solution player's image
-                    st.image(f"{solution_player["IMAGE"].values[0]}", width=200)
-                    # display the solution player's dataframe
-                    st.dataframe(styled_guessed_player, use_container_width=True, hide_index=True, column_order = ("NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"))
-                    # add button for restart
-                    if st.button("Click to Restart", key=f"correct_guess{i}"):
-                        # clearing the already guessed list
-                        st.session_state.already_guessed = []
-                        # making a new random solution player
-                        st.session_state.random_player_id = get_random_player_stats()["PERSON_ID"].values[0]
-                        st.rerun()
-        # if its the last guess and user correctly guesses it
-        elif i == 10:
-            # show the guessed player's dataframe
-            st.dataframe(guessed, use_container_width=True, hide_index=True, column_order = ("NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"))
-            # if guessed is correct
-            if solution_player["NAME"].values == guessed_player["NAME"].values:
-                with placeholder.container():
-                    st.write("YOU GOT IT")
-                    # show solution player image
-                    st.image(f"{solution_player["IMAGE"].values[0]}", width=200)
-                    # show styled solution player's dataframe
-                    st.dataframe(styled_guessed_player, use_container_width=True, hide_index=True, column_order = ("NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"))
-                    # make button for restart
-                    if st.button("Click to Restart", key=f"correct_guess{i}"):
-                        # clearing the already guessed list
-                        st.session_state.already_guessed = []
-                        # making a new random solution player
-                        st.session_state.random_player_id = get_random_player_stats()["PERSON_ID"].values[0]
-                        st.rerun()
-            # if user couldn't guess it and runs out of guesses
-            else:
-                with placeholder.container():
-                    st.write("You are out of guesses, the solution is: ")
-                    # show solution player picture
-                    st.image(f"{solution_player["IMAGE"].values[0]}", width=200)
-                    # show solution dataframe
-                    st.dataframe(solution_player, use_container_width=True, hide_index=True, column_order = ("NAME", "TEAM", "POSITION","AGE", "COUNTRY", "CONFERENCE", "DIVISION", "JERSEY"))
-                    # create button for restart
-                    if st.button("Click to Restart"):
-                        # clearing the already guessed list
-                        st.session_state.already_guessed = []
-                        # making a new random solution player
-                        st.session_state.random_player_id = get_random_player_stats()["PERSON_ID"].values[0]
-                        st.rerun()
 
+# start a new game with a new solution player
+def restart():
+    # clearing the already guessed list
+    st.session_state.already_guessed = GuessHistory()
+    # making a new random solution player
+    st.session_state.random_player_id = new_solution_id(st.session_state.difficulty)
+    st.rerun()
+
+
+# gameplay
+# if user guessed it
+if history.solved:
+    st.write("YOU GOT IT")
+    # display the solution player's image
+    st.image(solution_player["IMAGE"].values[0], width=200)
+    # display the solution player's row
+    st.dataframe(history.styled(limit=1), use_container_width=True, hide_index=True)
+    # add button for restart
+    if st.button("Click to Restart", key="correct_guess"):
+        restart()
+# if user couldn't guess it and runs out of guesses
+elif len(history) >= MAX_GUESSES:
+    st.write("You are out of guesses, the solution is: ")
+    # show solution player picture
+    st.image(solution_player["IMAGE"].values[0], width=200)
+    # show solution dataframe
+    st.dataframe(solution_player, use_container_width=True, hide_index=True, column_order = COMPARED_COLUMNS)
+    # create button for restart
+    if st.button("Click to Restart"):
+        restart()
+# still have guesses left
+else:
+    # displaying the amount of guesses left
+    st.write(f"{MAX_GUESSES - len(history)} guesse(s) left")
+    # how many players still fit every answer so far, and the solver's pick among them
+    if candidate_index is not None:
+        remaining = candidate_index.remaining(history)
+        st.write(f"{candidate_index.count(remaining)} player(s) still fit your guesses")
+        if remaining and st.button("Suggest a guess"):
+            st.write(f"Try {candidate_index.names[candidate_index.best_guess(remaining)]}")
+    # every guess so far in one table, latest first
+    st.dataframe(history.styled(), use_container_width=True, hide_index=True)
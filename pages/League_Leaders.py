@@ -1,13 +1,18 @@
 import streamlit as st
-import pandas as pd
+from helpers.dataset import get_store
+from helpers.leaders import get_leaderboard_index
+from helpers.aggregates import season_aggregates
 
 # set the page orientation for wide
 st.set_page_config(
     layout="wide",
 )
 
-# read in the file that contains all the 
-df = pd.read_csv("combined_nba_stats.csv")
+# read in the file that contains all the stats, memory mapped once per process and shared by every session
+store = get_store()
+
+# top players of every season and stat, precomputed once so the tables below don't scan or sort anything
+leaderboard_index = get_leaderboard_index(store)
 
 # all the seasons we have live data for
 seasons_to_choose_from = [
@@ -31,18 +36,8 @@ season_select = st.selectbox(
 
 # define the 5 best players by any stat any season
 def top5_players_by_stat(season, stat):
-     # only looking at the correct season
-     correct_season = df[df["Season"] == season]
-
-     # sorting by the given stat and only giving back the top 5
-     data_top5 = correct_season.sort_values(by=stat, ascending=False).head(5)
-
-     # setting Name as index
-     data_top5 = data_top5.set_index("Name")
-
-     # instead of showing every column, only show the selected stat, the one we sort by too
-     data_top5 = data_top5[stat]
-     return data_top5
+     # looking up the top 5 of the season in the given stat, indexed by Name and only showing the selected stat
+     return leaderboard_index.leaders(season, stat, 5)
 
 
 # set 3 columns for the stats to show
@@ -82,36 +77,58 @@ with col3:
     st.dataframe(top5_players_by_stat(season_select, "Three-Pointers %"), use_container_width=False)
 
 
+# ----------------------------------------------------------------------------------------------- Custom Leaderboard ------------------------------------------------------------------------------------------
+
+st.header("Custom Leaderboard")
+
+# any stat, any range of seasons, qualifiers and how many players to show
+col1, col2, col3 = st.columns(3)
+with col1:
+    query_stat = st.selectbox("Stat", leaderboard_index.stats, index=leaderboard_index.stats.index("Points / Game"))
+    query_seasons = st.select_slider(
+        "Seasons", options=seasons_to_choose_from[::-1], value=(seasons_to_choose_from[0], seasons_to_choose_from[0])
+    )
+with col2:
+    query_min_games = st.number_input("Minimum games", min_value=0, value=0, step=10)
+    query_min_attempts = st.number_input(
+        "Minimum attempts (the stat's own shots for a percentage, field goals otherwise)", min_value=0, value=0, step=50
+    )
+with col3:
+    query_n = st.number_input("Players", min_value=1, max_value=100, value=10)
+    query_ascending = st.checkbox("Lowest first")
+    query_per_player = st.checkbox("Add up the seasons of every player")
+
+# filtered and partially selected, the same query is served from memory the next time
+leaderboard = leaderboard_index.query(
+    query_stat, query_seasons, min_games=query_min_games, min_attempts=query_min_attempts,
+    n=query_n, ascending=query_ascending, per_player=query_per_player,
+)
+st.dataframe(leaderboard, use_container_width=True, hide_index=True)
+
+
 # ----------------------------------------------------------------------------------------------- Interesting Insights ------------------------------------------------------------------------------------------
 
 st.header("Interesting Insights")
 
-three_pointers_by_year = {}
-three_pointer_percentage_by_year = {}
-
-for season in seasons_to_choose_from[::-1]:  # Reverse the list to start from the earliest season
-    sum_3s = df[df["Season"]==season]["Three-Pointers Made"].sum()
-    percent_3s = df[df["Season"]==season]["Three-Pointers %"].mean()
+# every season's totals and averages, computed in one pass and cached until the data changes
+aggregates = season_aggregates(store)
 
-    three_pointers_by_year[season] = sum_3s
-    three_pointer_percentage_by_year[season] = percent_3s
+# Reverse the list to start from the earliest season
+three_pointers_by_year = aggregates["sum"]["Three-Pointers Made"].reindex(seasons_to_choose_from[::-1])
+three_pointer_percentage_by_year = aggregates["mean"]["Three-Pointers %"].reindex(seasons_to_choose_from[::-1])
 
 # set 11 columns to place the color dots and description
 col1, col2 = st.columns(2)
 
 with col1:
     st.write("Total 3 Pointers made across seasons")
-    made_3s_df = pd.DataFrame(three_pointers_by_year.items())
-    made_3s_df = made_3s_df.rename(columns={0:"Season", 1:"3 Pointers Made"})
-    made_3s_df = made_3s_df.set_index("Season")
+    made_3s_df = three_pointers_by_year.to_frame("3 Pointers Made")
     st.line_chart(made_3s_df)
 
 
 with col2:
     st.write("Total 3 Pointers Percentage across seasons")
-    percent_3s_df = pd.DataFrame(three_pointer_percentage_by_year.items())
-    percent_3s_df = percent_3s_df.rename(columns={0:"Season", 1:"3 %"})
-    percent_3s_df = percent_3s_df.set_index("Season")
+    percent_3s_df = three_pointer_percentage_by_year.to_frame("3 %")
     st.bar_chart(percent_3s_df)
 
 
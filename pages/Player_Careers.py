@@ -0,0 +1,94 @@
+import streamlit as st
+from helpers.dataset import get_store
+from helpers.careers import get_career_index
+from helpers.ranks import NO_PERCENTILE, NO_RANK, get_ranks
+
+# set the page orientation for wide
+st.set_page_config(
+    layout="wide",
+)
+
+# read in the file that contains all the stats, memory mapped once per process and shared by every session
+store = get_store()
+
+# every player's seasons, indexed once so a lookup is a slice and not a scan of the whole table
+career_index = get_career_index(store)
+
+# every season's rank and percentile in every stat, precomputed next to the dataset
+ranks = get_ranks(store)
+
+# the stats shown in the season by season table
+SEASON_COLUMNS = [
+    "Total Games", "Minutes / Game", "Points / Game", "Rebounds / Game", "Assists / Game", "Steals / Game",
+    "Blocks / Game", "Turnovers / Game", "Field Goal %", "Three-Pointers %", "Free Throw %", "Plus-Minus / Game",
+]
+
+
+st.title("Player Careers")
+
+# select a player, LeBron by default
+player = st.selectbox(
+    "Player", career_index.names, index=career_index.names.index("LeBron James") if "LeBron James" in career_index else 0
+)
+
+seasons = career_index.seasons(player, SEASON_COLUMNS)
+averages = career_index.averages(player)
+totals = career_index.totals(player)
+
+# picture from the latest season and the career in numbers
+image_col, stats_col = st.columns([1, 3])
+with image_col:
+    latest_image = store.column("IMAGE")[career_index.rows(player)[-1]]
+    st.image(latest_image, width=200)
+with stats_col:
+    st.subheader(f"{seasons.index[0]} - {seasons.index[-1]}, {len(seasons)} seasons")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Games", int(totals["Total Games"]))
+    col2.metric("Points", f"{averages['Points / Game']:.1f}", f"{int(totals['Points Scored'])} total", delta_color="off")
+    col3.metric("Rebounds", f"{averages['Rebounds / Game']:.1f}", f"{int(totals['Total Rebounds'])} total", delta_color="off")
+    col4.metric("Assists", f"{averages['Assists / Game']:.1f}", f"{int(totals['Assists'])} total", delta_color="off")
+
+
+# ----------------------------------------------------------------------------------------------- Season by season ------------------------------------------------------------------------------------------
+
+st.subheader("Season by season")
+st.dataframe(seasons[SEASON_COLUMNS], use_container_width=True)
+
+# where the player ranked among everybody that season, in every stat of the table
+rank_kind = st.radio("Season ranks as", ["Rank", "Percentile"], horizontal=True)
+season_ranks = ranks.frame(career_index.rows(player), SEASON_COLUMNS, rank_kind)
+season_ranks.index = seasons.index
+# missing values have no rank, they show up empty
+st.dataframe(season_ranks.where(season_ranks != (NO_RANK if rank_kind == "Rank" else NO_PERCENTILE)), use_container_width=True)
+
+# follow one stat through the career
+chart_stat = st.selectbox("Stat", SEASON_COLUMNS, index=SEASON_COLUMNS.index("Points / Game"))
+st.line_chart(seasons[chart_stat])
+
+
+# ----------------------------------------------------------------------------------------------- Career ------------------------------------------------------------------------------------------
+
+col1, col2 = st.columns(2)
+
+# career per game averages and percentages
+with col1:
+    st.subheader("Career averages")
+    st.dataframe(averages.round(3).rename("Career"), use_container_width=True)
+
+# career totals
+with col2:
+    st.subheader("Career totals")
+    st.dataframe(totals.astype(int).rename("Career"), use_container_width=True)
+
+
+# ----------------------------------------------------------------------------------------------- Best seasons ------------------------------------------------------------------------------------------
+
+st.subheader("Best seasons")
+
+# the best seasons of the player in any stat
+best_stat = st.selectbox("Best seasons by", career_index.stats, index=career_index.stats.index("Points / Game"))
+lowest = st.checkbox("Lowest first")
+best_seasons = career_index.best_seasons(player, best_stat, n=3, ascending=lowest).to_frame()
+# and where those seasons ranked in the league
+best_seasons["League rank"] = [ranks.rank_of(career_index.player_id(player), season, best_stat)[0] for season in best_seasons.index]
+st.dataframe(best_seasons, use_container_width=False)
@@ -0,0 +1,51 @@
+import streamlit as st
+from helpers.dataset import get_store
+from helpers.careers import get_career_index
+from helpers.similar import FEATURES, get_similarity_index
+
+# set the page orientation for wide
+st.set_page_config(
+    layout="wide",
+)
+
+# read in the file that contains all the stats, memory mapped once per process and shared by every session
+store = get_store()
+
+# every player's seasons, for picking the season to compare
+career_index = get_career_index(store)
+# every season as a standardized per game vector, built once so a search is one matrix product
+similarity_index = get_similarity_index(store)
+
+
+st.title("Similar Players")
+
+# pick a player and one of their seasons, LeBron by default
+col1, col2 = st.columns(2)
+with col1:
+    player = st.selectbox(
+        "Player", career_index.names, index=career_index.names.index("LeBron James") if "LeBron James" in career_index else 0
+    )
+with col2:
+    player_seasons = list(career_index.seasons(player, []).index)[::-1]
+    season = st.selectbox("Season", player_seasons)
+
+# how many matches and from which seasons
+col1, col2, col3 = st.columns(3)
+with col1:
+    k = st.slider("Matches", min_value=1, max_value=50, value=10)
+with col2:
+    era = st.select_slider(
+        "From the seasons", options=list(similarity_index.season_order),
+        value=(similarity_index.season_order[0], similarity_index.season_order[-1]),
+    )
+with col3:
+    other_players = st.checkbox("Only other players", value=True)
+
+# the season we are looking for
+st.subheader(f"{player}, {season}")
+st.dataframe(career_index.seasons(player, FEATURES).loc[[season]], use_container_width=True)
+
+# the closest seasons, the distance is over the standardized per game stats (0 is the same season)
+st.subheader("Most similar seasons")
+matches = similarity_index.similar(career_index.player_id(player), season, k=k, seasons=era, other_players=other_players)
+st.dataframe(matches, use_container_width=True, hide_index=True)